@@ -1,39 +1,40 @@
 
 import streamlit as st
 
-from logic.data import load_data
-from logic.ui import apply_sidebar_filters
-
-try:
-    import altair as alt
-except Exception:
-    alt = None
+from logic.cube import query_cube
+from logic.profiling import show_profile, stage, start_profiling
+from logic.startup import start_warmup
+from logic.ui import altair, load_filtered_cube, load_period_totals, period_delta
 
 st.set_page_config(page_title="Ads Dashboard v1", layout="wide")
 
-df = load_data()
-df, _filters = apply_sidebar_filters(df)
+start_warmup()
+start_profiling("Overview")
+df, filters = load_filtered_cube(dims=("channel",))
 
 st.title("Marketing Overview Dashboard")
 st.write("Use the sidebar filters to slice performance across all views.")
 
 if df.empty:
     st.warning("No data for the current filters.")
+    show_profile()
     st.stop()
 
-spend = df["cost"].sum()
-revenue = df["revenue"].sum()
-orders = df["orders"].sum()
+totals, previous = load_period_totals(df, filters)
+spend = totals["cost"]
+revenue = totals["revenue"]
+orders = totals["orders"]
 roas = revenue / spend if spend else 0
 
 row = st.columns(4)
-row[0].metric("Spend", f"€{spend:,.0f}")
-row[1].metric("Revenue", f"€{revenue:,.0f}")
-row[2].metric("Orders", f"{orders:,.0f}")
-row[3].metric("ROAS", f"{roas:.2f}")
+row[0].metric("Spend", f"€{spend:,.0f}", delta=period_delta(totals, previous, "cost"))
+row[1].metric("Revenue", f"€{revenue:,.0f}", delta=period_delta(totals, previous, "revenue"))
+row[2].metric("Orders", f"{orders:,.0f}", delta=period_delta(totals, previous, "orders"))
+row[3].metric("ROAS", f"{roas:.2f}", delta=period_delta(totals, previous, "revenue", "cost"))
 
 st.subheader("Channel Mix")
-mix = df.groupby("channel", as_index=False)[["cost", "revenue"]].sum()
+mix = query_cube(df, ["channel"], columns=["cost", "revenue"])
+alt = altair()
 if alt:
     chart = (
         alt.Chart(mix)
@@ -45,6 +46,9 @@ if alt:
             tooltip=["channel", "cost", "revenue"],
         )
     )
-    st.altair_chart(chart, use_container_width=True)
+    with stage("chart: Channel Mix"):
+        st.altair_chart(chart, use_container_width=True)
 else:
     st.bar_chart(mix.set_index("channel")["cost"])
+
+show_profile()
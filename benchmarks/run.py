@@ -0,0 +1,204 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORK_DIR = os.path.join(ROOT, "benchmarks", ".data")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+PAGES = ("app.py", "pages/1_Executive.py", "pages/2_Optimization.py", "pages/3_Keywords.py", "pages/4_Sales.py")
+# The Keywords page's grouping sets, timed as separate groupbys and as one bincount pass.
+KEYWORD_SETS = {
+    "keyword": (["keyword"], None),
+    "channel_keyword": (["channel", "keyword"], None),
+    "auto_terms": (["campaign", "keyword"], {"campaign_types": ["Auto"]}),
+}
+KEYWORD_METRICS = ["ctr", "atc_rate", "cvr", "roas", "cpc", "cpa"]
+
+# Cold loads must not be served from the persistent result cache, and the warmup thread
+# would race the timed page runs.
+os.environ["ADS_DASHBOARD_DISK_CACHE_MB"] = "0"
+os.environ["ADS_DASHBOARD_WARMUP"] = "0"
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import streamlit as st  # noqa: E402
+
+from logic.cube import load_filter_index, query_cube, query_cube_sets  # noqa: E402
+from logic.data import DATA_PATH, SNAPSHOT_DIR, load_data  # noqa: E402
+from logic.metrics import add_metrics  # noqa: E402
+from logic.optimization import optimization_flags  # noqa: E402
+from logic.synthetic import _count, write_data  # noqa: E402
+from logic.ui import FILTER_CACHE, apply_sidebar_filters  # noqa: E402
+
+
+def _clear_caches():
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    FILTER_CACHE.clear()
+
+
+def _measure(func, setup=None, repeat=3):
+    # Timed runs and the memory run are separate: tracemalloc slows allocation-heavy code.
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        func(arg)
+        times.append(time.perf_counter() - start)
+
+    arg = setup() if setup else None
+    tracemalloc.start()
+    func(arg)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": min(times), "median_seconds": statistics.median(times), "peak_mb": peak / 2**20}
+
+
+def _dataset(rows, seed):
+    # Each size gets its own working directory so the app's relative data paths resolve there.
+    directory = os.path.join(WORK_DIR, f"{rows}-{seed}")
+    path = os.path.join(directory, DATA_PATH)
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        write_data(path, rows, seed=seed)
+        print(f"  generated {rows:,} rows in {time.perf_counter() - start:.1f}s")
+    return directory
+
+
+def _stage_results(repeat):
+    results = {}
+
+    def load_csv(_):
+        shutil.rmtree(SNAPSHOT_DIR, ignore_errors=True)
+        _clear_caches()
+        load_data()
+
+    results["load_data (csv)"] = _measure(load_csv, repeat=repeat)
+    results["load_data (snapshot)"] = _measure(lambda _: load_data(), setup=_clear_caches, repeat=repeat)
+
+    df = load_data()
+    results["add_metrics"] = _measure(add_metrics, setup=lambda: df.copy(), repeat=repeat)
+
+    def filter_rows(frame):
+        FILTER_CACHE.clear()
+        apply_sidebar_filters(frame, copy=False)
+
+    results["apply_sidebar_filters"] = _measure(filter_rows, setup=lambda: df, repeat=repeat)
+
+    with_metrics = add_metrics(df.copy())
+    results["optimization_flags"] = _measure(optimization_flags, setup=lambda: with_metrics.copy(), repeat=repeat)
+
+    cube = load_filter_index(dims=("campaign", "keyword"))["frame"]
+
+    def keyword_groupbys(_):
+        for dims, filters in KEYWORD_SETS.values():
+            query_cube(cube, dims, filters=filters, metrics=KEYWORD_METRICS)
+
+    results["keyword rollups (groupby)"] = _measure(keyword_groupbys, repeat=repeat)
+    results["keyword rollups (bincount)"] = _measure(
+        lambda _: query_cube_sets(cube, KEYWORD_SETS, metrics=KEYWORD_METRICS), repeat=repeat
+    )
+    return results
+
+
+def _page_results(repeat):
+    from streamlit.testing.v1 import AppTest
+
+    results = {}
+    for page in PAGES:
+        script = os.path.join(ROOT, page)
+
+        def run(_):
+            at = AppTest.from_file(script, default_timeout=600).run()
+            if at.exception:
+                raise RuntimeError(f"{page}: {at.exception[0].value}")
+
+        _clear_caches()
+        start = time.perf_counter()
+        run(None)
+        cold = time.perf_counter() - start
+        # Warm runs reuse the cubes and filter index, as a rerun on a live server does.
+        results[f"page {page}"] = dict(_measure(run, repeat=repeat), cold_seconds=cold)
+    return results
+
+
+def run_benchmarks(sizes, seed=42, repeat=3, pages=True):
+    results = {}
+    cwd = os.getcwd()
+    try:
+        for rows in sizes:
+            print(f"{rows:,} rows")
+            os.chdir(_dataset(rows, seed))
+            results[str(rows)] = _stage_results(repeat)
+            if pages:
+                results[str(rows)].update(_page_results(repeat))
+            for stage, measured in results[str(rows)].items():
+                print(f"  {stage:<32} {measured['seconds'] * 1000:10.1f} ms  {measured['peak_mb']:8.1f} MB")
+            groupby, bincount = (results[str(rows)][f"keyword rollups ({k})"] for k in ("groupby", "bincount"))
+            print(
+                f"  keyword rollups speedup: {groupby['seconds'] / bincount['seconds']:.2f}x, "
+                f"peak memory {bincount['peak_mb'] / groupby['peak_mb']:.2f}x"
+            )
+    finally:
+        os.chdir(cwd)
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "streamlit": st.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance=0.25, min_seconds=0.005):
+    # A stage regresses when it is both relatively and absolutely slower than the baseline.
+    regressions = []
+    for size, stages in current["results"].items():
+        for stage, measured in stages.items():
+            before = baseline["results"].get(size, {}).get(stage)
+            if before is None:
+                continue
+            slower = measured["seconds"] - before["seconds"]
+            if slower > min_seconds and measured["seconds"] > before["seconds"] * (1 + tolerance):
+                regressions.append((size, stage, before["seconds"], measured["seconds"]))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time and memory-profile the dashboard's compute stages.")
+    parser.add_argument("--sizes", default="10k,100k,1m", help="comma-separated row counts, e.g. 10k,1m,50m")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-pages", action="store_true", help="skip the per-page AppTest runs")
+    parser.add_argument("--out", default=os.path.join(RESULTS_DIR, "latest.json"))
+    parser.add_argument("--compare", help="baseline results file, e.g. benchmarks/results/baseline.json")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging")
+    args = parser.parse_args()
+
+    sizes = [_count(size) for size in args.sizes.split(",") if size.strip()]
+    current = run_benchmarks(sizes, seed=args.seed, repeat=args.repeat, pages=not args.no_pages)
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w") as fh:
+        json.dump(current, fh, indent=2)
+    print(f"Results written to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as fh:
+            regressions = compare(current, json.load(fh), tolerance=args.tolerance)
+        for size, stage, before, after in regressions:
+            print(f"REGRESSION {size} rows, {stage}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,88 @@
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LRUCache:
+    def __init__(self, max_entries=32, max_bytes=None, sizeof=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda value: 0)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._pending = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        # Single flight: concurrent misses on one key wait for the first caller's result
+        # instead of computing it again.
+        with self._lock:
+            pending = self._pending.setdefault(key, threading.Lock())
+        with pending:
+            value = self.get(key, _MISSING)
+            if value is _MISSING:
+                value = compute()
+                self.put(key, value)
+        with self._lock:
+            if self._pending.get(key) is pending:
+                del self._pending[key]
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_VERSIONS = {}
+_VERSIONS_LOCK = threading.Lock()
+
+
+# Caches keyed by a dataset version never read an older version's entries again, so the
+# first lookup with a new version clears them rather than leaving full-size frames to
+# age out of the LRU.
+def retire_versions(name, version, clear):
+    with _VERSIONS_LOCK:
+        previous = _VERSIONS.get(name, version)
+        _VERSIONS[name] = version
+    if previous != version:
+        clear()
@@ -0,0 +1,125 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from logic.profiling import profiled
+
+# Altair embeds a chart's whole source frame in the spec sent to the browser. Frames whose
+# estimated JSON payload exceeds this are reduced before charting; 0 disables reduction.
+CHART_MAX_BYTES = int(float(os.environ.get("ADS_DASHBOARD_CHART_MAX_KB", "256")) * 1024)
+# Rows kept by time-series downsampling and categories kept before the "Other" bucket.
+CHART_POINTS = int(os.environ.get("ADS_DASHBOARD_CHART_POINTS", "1000"))
+CHART_TOP_N = int(os.environ.get("ADS_DASHBOARD_CHART_TOP_N", "50"))
+
+OTHER_LABEL = "Other"
+
+
+def payload_bytes(df, sample=200):
+    # Extrapolated from the JSON size of the first rows, as Altair serializes them.
+    if df.empty:
+        return 0
+    head = df.head(sample)
+    return int(len(head.to_json(orient="records", date_format="iso")) * len(df) / len(head))
+
+
+def _over_budget(df, max_bytes):
+    max_bytes = CHART_MAX_BYTES if max_bytes is None else max_bytes
+    return bool(max_bytes) and payload_bytes(df) > max_bytes
+
+
+def _numeric(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        values = values.astype("datetime64[ns]").astype(np.int64)
+    return np.nan_to_num(values.astype(float))
+
+
+# Largest-triangle-three-buckets: keeps the first and last point and, from each bucket in
+# between, the point forming the largest triangle with the previously kept point and the
+# next bucket's average. Returns sorted row positions.
+def lttb_indices(x, y, points):
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n)
+    x, y = _numeric(x), _numeric(y)
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_start, next_stop = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = x[next_start:next_stop].mean()
+        avg_y = y[next_start:next_stop].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+# Downsamples a time series frame (sorted by x) to about `points` rows. Each y column gets
+# an equal share of the budget and the union of the kept rows is returned, so layered
+# charts drawn from the same frame stay aligned.
+@profiled("downsample_series")
+def downsample_series(df, x, columns, points=None, max_bytes=None):
+    if not _over_budget(df, max_bytes):
+        return df
+    points = CHART_POINTS if points is None else points
+    per_series = max(points // max(len(columns), 1), 3)
+    keep = np.unique(np.concatenate([lttb_indices(df[x], df[col], per_series) for col in columns]))
+    return df.iloc[keep].reset_index(drop=True)
+
+
+# Keeps the top_n rows by `value` and sums the rest into one "Other" row. Share columns
+# (cumulative or not) are computed on the full frame first, so they stay exact:
+# share_column gets each row's share of the total, cum_share_column the running share,
+# which reaches 1.0 on the "Other" row.
+@profiled("collapse_categories")
+def collapse_categories(
+    df,
+    category,
+    value,
+    columns=None,
+    top_n=None,
+    share_column=None,
+    cum_share_column=None,
+    max_bytes=None,
+):
+    top_n = CHART_TOP_N if top_n is None else top_n
+    df = df.sort_values(value, ascending=False, kind="stable")
+    total = df[value].sum()
+    if share_column or cum_share_column:
+        df = df.copy()
+        if share_column:
+            df[share_column] = df[value] / total if total else 0.0
+        if cum_share_column:
+            df[cum_share_column] = df[value].cumsum() / total if total else 0.0
+    if len(df) <= top_n + 1 or not _over_budget(df, max_bytes):
+        return df.reset_index(drop=True)
+
+    head, tail = df.iloc[:top_n], df.iloc[top_n:]
+    other = {col: tail[col].sum() for col in [value] + list(columns or []) if col != category}
+    other[category] = OTHER_LABEL
+    if share_column:
+        other[share_column] = tail[share_column].sum()
+    if cum_share_column:
+        other[cum_share_column] = 1.0 if total else 0.0
+    head = head.assign(**{category: head[category].astype(object)})
+    return pd.concat([head, pd.DataFrame([other])], ignore_index=True)
+
+
+# What transform_fold(columns, as_=[key, value]) computes in the browser: one row per x
+# and folded column. Only x and the folded values are kept, so the chart carries
+# len(columns) values per x instead of every column of the source frame. The key is
+# categorical, so each series name is sent once rather than once per row.
+def fold_series(df, x, columns, key="metric", value="value"):
+    folded = df.melt(id_vars=[x], value_vars=list(columns), var_name=key, value_name=value)
+    folded[key] = pd.Categorical(folded[key], categories=list(columns))
+    return folded
+
+
+# What a count() encoding computes in the browser: one row per observed value of column.
+# Missing values form their own group, as they do in Vega.
+def count_rows(df, column, as_="count"):
+    return df.groupby(column, observed=True, dropna=False).size().reset_index(name=as_)
@@ -0,0 +1,335 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from logic.data import (
+    ARROW_MMAP,
+    COMPACT_DEFAULT,
+    DATA_PATH,
+    compact_frame,
+    dataset_version,
+    load_data,
+    prepare_rows,
+    read_snapshot,
+    sync_snapshot,
+)
+from logic import duckdb_backend
+from logic.cache import retire_versions
+from logic.disk_cache import persistent
+from logic.filter_index import build_filter_index
+from logic.partitions import (
+    partition_date_bounds,
+    partitioned_layout_available,
+    partitions_version,
+    read_partitions,
+)
+from logic.prefix_index import build_prefix_index
+from logic.profiling import stage
+from logic.shared import share_frame
+from logic.metrics import ADDITIVE_COLUMNS, add_ratios, rollup
+
+CUBE_DIMENSIONS = ("date_day", "channel", "campaign_type", "campaign", "keyword", "product", "category")
+# Sidebar filters run against the cube, so these dimensions are always kept.
+FILTER_DIMENSIONS = ("date_day", "channel", "campaign_type", "product")
+
+# When set, cubes are built by streaming the CSV in chunks of this many rows.
+INGEST_CHUNK_ROWS = int(os.environ.get("ADS_DASHBOARD_INGEST_CHUNK_ROWS", "0")) or None
+
+# Last cube built per dimension set, so appended snapshot parts can be folded in. Once a
+# new version is loaded, this is the only reference left to the previous cube.
+_CUBE_STATE = {}
+_CUBE_LOCK = threading.Lock()
+
+
+def build_cube(df, dims=CUBE_DIMENSIONS):
+    dims = [d for d in dims if d in df.columns]
+    values = [c for c in ADDITIVE_COLUMNS if c in df.columns]
+    return df.groupby(dims, as_index=False, observed=True, sort=False)[values].sum()
+
+
+def stream_cube(path=DATA_PATH, dims=CUBE_DIMENSIONS, chunk_rows=500_000):
+    # Peak memory is one prepared chunk plus the running aggregate, never the whole file.
+    header = pd.read_csv(path, nrows=0).columns
+    dims = [d for d in dims if d == "date_day" or d in header]
+    values = [c for c in ADDITIVE_COLUMNS if c in header]
+    usecols = list(dict.fromkeys(["date", "channel"] + [d for d in dims if d != "date_day"] + values))
+
+    total = None
+    for chunk in pd.read_csv(path, usecols=usecols, parse_dates=["date"], chunksize=chunk_rows):
+        part = build_cube(prepare_rows(chunk), dims)
+        total = part if total is None else build_cube(pd.concat([total, part], ignore_index=True), dims)
+    if total is None:
+        total = pd.DataFrame(columns=dims + values)
+    return total
+
+
+def _incremental_cube(dims, manifest):
+    # Folds only snapshot parts added since the last build into the previous cube.
+    columns = list(dims) + list(ADDITIVE_COLUMNS)
+    with _CUBE_LOCK:
+        state = _CUBE_STATE.get(dims)
+        parts = manifest["parts"]
+        if state is not None and parts[: len(state["parts"])] == state["parts"]:
+            new_parts = parts[len(state["parts"]) :]
+            cube = state["cube"]
+            if new_parts:
+                delta = build_cube(read_snapshot(manifest, columns, parts=new_parts), dims)
+                cube = build_cube(pd.concat([cube, delta], ignore_index=True), dims)
+        else:
+            cube = build_cube(read_snapshot(manifest, columns), dims)
+        # Stored shared, so the state and the uncompacted cache entry are one frame.
+        cube = share_frame(cube)
+        _CUBE_STATE[dims] = {"parts": list(parts), "cube": cube}
+        return cube
+
+
+def load_cube(dims=CUBE_DIMENSIONS, compact=None, chunk_rows=None):
+    dims = tuple(dict.fromkeys(FILTER_DIMENSIONS + tuple(dims)))
+    version = dataset_version()
+    retire_versions("cube", version, _load_cube.clear)
+    return _load_cube(dims, compact, chunk_rows, version)
+
+
+# Cubes and filter indexes are held once per process and shared read-only by every session.
+# They are keyed by dataset version, and the previous version's entries are dropped when
+# it changes.
+@st.cache_resource(max_entries=16)
+def _load_cube(dims, compact, chunk_rows, version):
+    compact = COMPACT_DEFAULT if compact is None else compact
+    chunk_rows = INGEST_CHUNK_ROWS if chunk_rows is None else chunk_rows
+    return share_frame(_compute_cube(dims, compact, chunk_rows, version))
+
+
+@persistent("cube")
+def _compute_cube(dims, compact, chunk_rows, version):
+    # In Arrow mode cubes are built from the memory-mapped dataset rather than the Parquet parts.
+    manifest = None if chunk_rows or ARROW_MMAP else sync_snapshot(DATA_PATH)
+    if manifest is not None:
+        cube = _incremental_cube(dims, manifest)
+    elif chunk_rows:
+        cube = stream_cube(DATA_PATH, dims, chunk_rows)
+    else:
+        cube = build_cube(load_data(columns=dims + ADDITIVE_COLUMNS, compact=False), dims)
+
+    if compact:
+        cube = compact_frame(cube)
+    return cube
+
+
+def load_filter_index(dims=CUBE_DIMENSIONS, compact=None):
+    version = dataset_version()
+    retire_versions("filter_index", version, _load_filter_index.clear)
+    return _load_filter_index(tuple(dims), compact, version)
+
+
+@st.cache_resource(max_entries=8)
+def _load_filter_index(dims, compact, version):
+    index = build_filter_index(load_cube(dims=dims, compact=compact))
+    index["version"] = (version, dims, compact)
+    index["frame"] = share_frame(index["frame"], source=(index["version"], None, None))
+    return index
+
+
+def load_partition_cube(dims, date_range, selections, compact=None):
+    dims = tuple(dict.fromkeys(FILTER_DIMENSIONS + tuple(dims)))
+    selections = tuple(
+        (col, None if values is None else tuple(sorted(values))) for col, values in sorted(selections.items())
+    )
+    version = partitions_version()
+    retire_versions("partition_cube", version, _load_partition_cube.clear)
+    return _load_partition_cube(dims, tuple(date_range), selections, compact, version)
+
+
+@st.cache_resource(max_entries=32)
+def _load_partition_cube(dims, date_range, selections, compact, version):
+    compact = COMPACT_DEFAULT if compact is None else compact
+    cube = _compute_partition_cube(dims, date_range, selections, compact, version)
+    return share_frame(cube, source=((version, dims, date_range, selections, compact), None, None))
+
+
+@persistent("partition_cube")
+def _compute_partition_cube(dims, date_range, selections, compact, version):
+    columns = [d for d in dims if d != "date_day"] + list(ADDITIVE_COLUMNS)
+    rows = read_partitions(date_range, dict(selections), columns=columns)
+    cube = build_cube(rows, dims)
+    if compact:
+        cube = compact_frame(cube)
+    return cube
+
+
+def load_prefix_index():
+    partitioned = partitioned_layout_available()
+    version = partitions_version() if partitioned else dataset_version()
+    retire_versions("prefix_index", (partitioned, version), _load_prefix_index.clear)
+    return _load_prefix_index(partitioned, version)
+
+
+# Cumulative daily totals per filter combination over the full history, or None (logged)
+# if too large.
+@st.cache_resource(max_entries=2)
+def _load_prefix_index(partitioned, version):
+    prefix = _compute_prefix_index(partitioned, version)
+    if prefix is not None:
+        prefix["keys"].flags.writeable = False
+        prefix["cumulative"].flags.writeable = False
+    return prefix
+
+
+@persistent("prefix_index")
+def _compute_prefix_index(partitioned, version):
+    if partitioned:
+        columns = [d for d in FILTER_DIMENSIONS if d != "date_day"] + list(ADDITIVE_COLUMNS)
+        cube = build_cube(read_partitions(partition_date_bounds(), {}, columns=columns), FILTER_DIMENSIONS)
+    else:
+        cube = load_cube(dims=FILTER_DIMENSIONS, compact=False)
+    return build_prefix_index(cube)
+
+
+def _filter_mask(cube, filters):
+    mask = np.ones(len(cube), dtype=bool)
+    if "date_range" in filters:
+        start_date, end_date = filters["date_range"]
+        days = cube["date_day"].dt.date
+        mask &= ((days >= start_date) & (days <= end_date)).to_numpy()
+    for key, col in (("channels", "channel"), ("campaign_types", "campaign_type"), ("products", "product")):
+        if filters.get(key) is not None:
+            mask &= cube[col].isin(filters[key]).to_numpy()
+    return mask
+
+
+def query_cube(cube, dims, filters=None, columns=ADDITIVE_COLUMNS, metrics=()):
+    with stage(f"query_cube[{', '.join(dims)}]", rows_in=len(cube)) as s:
+        if duckdb_backend.duckdb_enabled() and duckdb_backend.supports(cube):
+            out = duckdb_backend.rollup(cube, dims, filters=filters, columns=columns, metrics=metrics)
+        else:
+            if filters:
+                cube = cube.loc[_filter_mask(cube, filters)]
+            out = rollup(cube, dims, metrics=metrics, columns=columns)
+        s.out(out)
+    return out
+
+
+# Combined group codes are renumbered with a dense bincount while the code space has at
+# most this many slots (or 4x the rows), and with np.unique beyond that.
+DENSE_GROUP_SLOTS = 1 << 16
+
+
+def _compact(combined, slots, n_rows):
+    if slots <= max(DENSE_GROUP_SLOTS, 4 * n_rows):
+        keys = np.flatnonzero(np.bincount(combined, minlength=slots))
+        remap = np.empty(slots, dtype=np.int64)
+        remap[keys] = np.arange(len(keys))
+        return remap[combined], keys
+    keys, inverse = np.unique(combined, return_inverse=True)
+    return inverse, keys
+
+
+def _group_codes(codes, sizes, n_rows):
+    # Combines the code columns left to right and renumbers the observed combinations
+    # whenever the next column would overflow the dense code space. Returns the group of
+    # each row, the number of groups and each group's code per column, with groups in
+    # lexicographic order as a sorted groupby returns them.
+    groups = np.zeros(n_rows, dtype=np.int64)
+    n_groups, group_codes, pending = 1, [], []
+    for i, (col_codes, size) in enumerate(zip(codes, sizes)):
+        groups = groups * size + col_codes
+        n_groups *= size
+        pending.append(size)
+        if i + 1 == len(codes) or n_groups * sizes[i + 1] > max(DENSE_GROUP_SLOTS, 4 * n_rows):
+            groups, keys = _compact(groups, n_groups, n_rows)
+            parts = np.unravel_index(keys, [n_groups // int(np.prod(pending))] + pending)
+            group_codes = [g[parts[0]] for g in group_codes] + list(parts[1:])
+            n_groups, pending = len(keys), []
+    return groups, n_groups, group_codes
+
+
+# query_cube for several grouping sets at once. sets maps a name to (dims, filters), with
+# filters as in query_cube (None for all rows); returns {name: frame}, each equal to
+# query_cube(cube, dims, filters, columns, metrics) except that integer sums are always
+# int64, where groupby keeps narrow compact dtypes that do not overflow.
+#
+# Every dimension (and filtered column) is factorized once, and the additive columns are
+# summed into the combinations of all of them in a single bincount pass over the rows.
+# Each set is then re-aggregated from those base groups, which are far fewer than rows,
+# so adding a set, or a masked subset such as Auto campaigns only, costs almost nothing.
+def query_cube_sets(cube, sets, columns=ADDITIVE_COLUMNS, metrics=()):
+    label = "; ".join(", ".join(dims) for dims, _ in sets.values())
+    with stage(f"query_cube_sets[{label}]", rows_in=len(cube)) as s:
+        if duckdb_backend.duckdb_enabled() and duckdb_backend.supports(cube):
+            out = {
+                name: duckdb_backend.rollup(cube, dims, filters=filters, columns=columns, metrics=metrics)
+                for name, (dims, filters) in sets.items()
+            }
+        else:
+            out = _grouping_sets(cube, sets, [c for c in columns if c in cube.columns], metrics)
+        s.out(next(iter(out.values()), None))
+    return out
+
+
+def _grouping_sets(cube, sets, columns, metrics):
+    filter_columns = {
+        "date_range": "date_day",
+        "channels": "channel",
+        "campaign_types": "campaign_type",
+        "products": "product",
+    }
+    base_dims = []
+    for dims, filters in sets.values():
+        used = list(dims) + [filter_columns[key] for key, value in (filters or {}).items() if value is not None]
+        base_dims += [d for d in used if d not in base_dims]
+
+    # Code 0 is reserved for missing values, which groupby drops per set.
+    codes, uniques = [], []
+    for dim in base_dims:
+        dim_codes, dim_uniques = pd.factorize(cube[dim], sort=True)
+        codes.append(dim_codes.astype(np.int32) + 1)
+        uniques.append(dim_uniques)
+    sizes = [len(u) + 1 for u in uniques]
+
+    # Each set renumbers its own groups, so the base order is free: small dimensions go
+    # first, which needs the fewest renumbering passes over the rows.
+    order = sorted(range(len(base_dims)), key=sizes.__getitem__)
+    base_dims, codes, uniques, sizes = (
+        [items[i] for i in order] for items in (base_dims, codes, uniques, sizes)
+    )
+    row_groups, n_groups, group_codes = _group_codes(codes, sizes, len(cube))
+    sums = {}
+    for col in columns:
+        values = cube[col].to_numpy()
+        total = np.bincount(row_groups, weights=values.astype(np.float64, copy=False), minlength=n_groups)
+        if np.issubdtype(values.dtype, np.integer):
+            sums[col] = np.rint(total).astype(np.int64)
+        else:
+            # bincount returns integers for empty input.
+            sums[col] = total.astype(np.float64, copy=False)
+
+    out = {}
+    for name, (dims, filters) in sets.items():
+        positions = [base_dims.index(d) for d in dims]
+        keep = np.ones(n_groups, dtype=bool)
+        for i in positions:
+            keep &= group_codes[i] > 0
+        # Filters are evaluated once per distinct value and looked up by code.
+        for key, value in (filters or {}).items():
+            if value is None:
+                continue
+            i = base_dims.index(filter_columns[key])
+            allowed = _filter_mask(pd.DataFrame({base_dims[i]: uniques[i]}), {key: value})
+            keep &= np.concatenate([[False], allowed])[group_codes[i]]
+
+        set_codes = [group_codes[i][keep] for i in positions]
+        set_groups, n_set, set_dim_codes = _group_codes(set_codes, [sizes[i] for i in positions], int(keep.sum()))
+        frame = {dim: _group_values(uniques[i], c) for dim, i, c in zip(dims, positions, set_dim_codes)}
+        for col in columns:
+            total = np.bincount(set_groups, weights=sums[col][keep], minlength=n_set)
+            frame[col] = total.astype(sums[col].dtype)
+        out[name] = add_ratios(pd.DataFrame(frame), metrics)
+    return out
+
+
+def _group_values(dim_uniques, codes):
+    # Codes are shifted by one for the missing-value slot.
+    return dim_uniques.take(np.maximum(codes - 1, 0))
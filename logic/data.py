@@ -1,13 +1,41 @@
+import hashlib
+import io
+import json
+import os
+import threading
+
 import pandas as pd
 import streamlit as st
 
+from logic.cache import retire_versions
+from logic.disk_cache import persistent
 from logic.metrics import add_metrics
+from logic.profiling import profiled
+from logic.shared import share_frame
+
+DATA_PATH = "data/ads_data.csv"
+SNAPSHOT_DIR = "data/.cache"
+# Bump when the processed frame layout changes so stale snapshots are ignored.
+SNAPSHOT_VERSION = 4
+# Block size for hashing exports; the whole previously ingested content is hashed.
+HASH_BLOCK_BYTES = 1 << 20
+
+_SNAPSHOT_LOCK = threading.Lock()
+
+# Columns apply_sidebar_filters needs; pages that prune columns must keep these.
+FILTER_COLUMNS = ("date", "channel", "campaign_type", "product")
+
+DIMENSION_COLUMNS = ("channel", "campaign_type", "campaign", "keyword", "match_type", "product", "category")
+# Additive money columns stay float64: pages sum them over millions of rows.
+RATIO_COLUMNS = ("ctr", "cvr", "roas", "cpc", "cpa", "acos", "rpc", "atc_rate", "checkout_rate")
 
+COMPACT_DEFAULT = os.environ.get("ADS_DASHBOARD_COMPACT", "").lower() in ("1", "true", "yes")
 
-@st.cache_data
-def load_data():
-    df = pd.read_csv("data/ads_data.csv", parse_dates=["date"])
+# Serve load_data from one uncompressed Arrow IPC file memory-mapped by every server process.
+ARROW_MMAP = os.environ.get("ADS_DASHBOARD_ARROW_MMAP", "").lower() in ("1", "true", "yes")
 
+
+def prepare_rows(df):
     # Make channel mix less uniform so spend/revenue concentration looks realistic.
     channel_volume_scale = {
         "Amazon": 1.85,
@@ -28,6 +56,272 @@ def load_data():
             df[col] = (df[col] * df["channel_scale"]).round(2).clip(lower=0)
 
     df = df.drop(columns=["channel_scale"])
-    df = add_metrics(df)
     df["date_day"] = df["date"].dt.floor("D")
     return df
+
+
+def _signature(stat):
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def _source_signature(path):
+    return _signature(os.stat(path))
+
+
+def _snapshot_dir(path):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(SNAPSHOT_DIR, f"{stem}-v{SNAPSHOT_VERSION}")
+
+
+def _read_manifest(directory):
+    try:
+        with open(os.path.join(directory, "manifest.json")) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(target, write):
+    # Written to a temp file first so concurrent sessions never read a partial file.
+    tmp = f"{target}.{os.getpid()}.tmp"
+    try:
+        write(tmp)
+        os.replace(tmp, target)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _content_hash(path, end):
+    # Hash of the first end bytes, and whether they end a line.
+    digest = hashlib.sha1()
+    last = b""
+    with open(path, "rb") as fh:
+        while fh.tell() < end:
+            block = fh.read(min(HASH_BLOCK_BYTES, end - fh.tell()))
+            if not block:
+                break
+            digest.update(block)
+            last = block[-1:]
+    return digest, last == b"\n"
+
+
+def _append_hash(path, manifest, size):
+    # The running hash of the previous export when the new one starts with exactly its
+    # bytes, else None. Any edit before the previous end of file forces a full rebuild.
+    if manifest is None or size <= manifest["size"]:
+        return None
+    digest, ends_with_newline = _content_hash(path, manifest["size"])
+    if not ends_with_newline or digest.hexdigest() != manifest["content_hash"]:
+        return None
+    return digest
+
+
+def _appended_rows(path, offset, size, digest):
+    header = pd.read_csv(path, nrows=0).columns.tolist()
+    with open(path, "rb") as fh:
+        fh.seek(offset)
+        tail = fh.read(size - offset)
+    digest.update(tail)
+    return pd.read_csv(io.BytesIO(tail), header=None, names=header, parse_dates=["date"])
+
+
+def _write_manifest(target, manifest):
+    with open(target, "w") as fh:
+        json.dump(manifest, fh)
+
+
+# Brings the Parquet snapshot of path up to date and returns its manifest, or None
+# when Parquet is unavailable. If the CSV only grew and everything up to the previous
+# end of file is byte-for-byte unchanged, only the appended rows are parsed and stored
+# as a new part.
+def sync_snapshot(path=DATA_PATH):
+    directory = _snapshot_dir(path)
+    with _SNAPSHOT_LOCK:
+        stat = os.stat(path)
+        version = _signature(stat)
+        manifest = _read_manifest(directory)
+        if manifest is not None and manifest["version"] == version:
+            return dict(manifest, directory=directory)
+
+        try:
+            os.makedirs(directory, exist_ok=True)
+            digest = _append_hash(path, manifest, stat.st_size)
+            if digest is not None:
+                rows = prepare_rows(_appended_rows(path, manifest["size"], stat.st_size, digest))
+                generation = manifest["generation"]
+                parts = manifest["parts"]
+            else:
+                rows = prepare_rows(pd.read_csv(path, parse_dates=["date"]))
+                digest = _content_hash(path, stat.st_size)[0]
+                generation = version
+                parts = []
+
+            part = f"part-{generation}-{len(parts):05d}.parquet"
+            _write_atomic(os.path.join(directory, part), lambda tmp: rows.to_parquet(tmp, index=False))
+            manifest = {
+                "version": version,
+                "generation": generation,
+                "size": stat.st_size,
+                "content_hash": digest.hexdigest(),
+                "parts": parts + [part],
+            }
+            _write_atomic(os.path.join(directory, "manifest.json"), lambda tmp: _write_manifest(tmp, manifest))
+        except (ImportError, OSError, ValueError):
+            return None
+
+        keep = set(manifest["parts"]) | {"manifest.json"}
+        for name in os.listdir(directory):
+            if name not in keep and not name.endswith((".tmp", ".arrow")):
+                os.remove(os.path.join(directory, name))
+        return dict(manifest, directory=directory)
+
+
+def read_snapshot(manifest, columns=None, parts=None):
+    frames = [
+        pd.read_parquet(os.path.join(manifest["directory"], part), columns=columns)
+        for part in (manifest["parts"] if parts is None else parts)
+    ]
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+
+def _arrow_path(path, version):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(_snapshot_dir(path), f"{stem}-{version}.arrow")
+
+
+def _write_arrow(target, df):
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(target, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+# Writes the processed dataset as an Arrow IPC file once per dataset version and returns
+# its path, or None when pyarrow is unavailable. Replicas on the same host find the file
+# already there and only map it.
+def sync_arrow_file(path=DATA_PATH):
+    version = _source_signature(path)
+    target = _arrow_path(path, version)
+    if os.path.exists(target):
+        return target
+
+    manifest = sync_snapshot(path)
+    with _SNAPSHOT_LOCK:
+        if os.path.exists(target):
+            return target
+        try:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if manifest is not None and manifest["version"] == version:
+                df = read_snapshot(manifest)
+            else:
+                df = prepare_rows(pd.read_csv(path, parse_dates=["date"]))
+            _write_atomic(target, lambda tmp: _write_arrow(tmp, df))
+        except (ImportError, OSError, ValueError):
+            return None
+
+        directory = os.path.dirname(target)
+        for name in os.listdir(directory):
+            # Files of older versions may still be mapped by other processes; unlinking is safe on POSIX.
+            if name.endswith(".arrow") and os.path.join(directory, name) != target:
+                os.remove(os.path.join(directory, name))
+        return target
+
+
+def read_arrow_file(target, columns=None):
+    import pyarrow as pa
+
+    # Numeric and datetime columns become read-only views of the mapped pages and strings
+    # stay Arrow-backed, so nothing is copied into process memory.
+    table = pa.ipc.open_file(pa.memory_map(target)).read_all()
+    if columns is not None:
+        table = table.select(list(columns))
+    return table.to_pandas(split_blocks=True)
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def compact_frame(df):
+    df = df.copy()
+    for col in DIMENSION_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    for col in df.select_dtypes(include="integer").columns:
+        df[col] = pd.to_numeric(df[col], downcast="integer")
+    for col in RATIO_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("float32")
+    return df
+
+
+def compact_report(df, compacted=None):
+    if compacted is None:
+        compacted = compact_frame(df)
+    before = frame_bytes(df)
+    after = frame_bytes(compacted)
+    return {
+        "before_bytes": before,
+        "after_bytes": after,
+        "saved_ratio": 1 - after / before if before else 0.0,
+    }
+
+
+def dataset_version(path=DATA_PATH):
+    return _source_signature(path)
+
+
+@profiled("load_data")
+def load_data(columns=None, compact=None, row_metrics=False):
+    # The dataset version is part of the cache key, so a new export is picked up on the next rerun
+    # and the previous version's frames are released.
+    # The frame is held once per process and shared read-only; call .copy() before modifying it.
+    columns = tuple(columns) if columns is not None else None
+    version = dataset_version()
+    retire_versions("load_data", version, _load_data.clear)
+    return _load_data(columns, compact, row_metrics, version)
+
+
+@st.cache_resource(max_entries=16)
+def _load_data(columns, compact, row_metrics, version):
+    compact = COMPACT_DEFAULT if compact is None else compact
+    return share_frame(_read_data(columns, compact, row_metrics, version))
+
+
+def _read_data(columns, compact, row_metrics, version):
+    # The memory-mapped Arrow file and the Parquet snapshot already persist the dataset,
+    # so only a frame parsed straight from the CSV goes into the on-disk result cache.
+    arrow_file = sync_arrow_file(DATA_PATH) if ARROW_MMAP else None
+    manifest = None if arrow_file else sync_snapshot(DATA_PATH)
+    if arrow_file is None and manifest is None:
+        return _parse_data(columns, compact, row_metrics, version)
+
+    columns = list(columns) if columns is not None else None
+    if arrow_file is not None:
+        df = read_arrow_file(arrow_file, columns)
+    else:
+        df = read_snapshot(manifest, columns)
+    return _finish_data(df, compact, row_metrics)
+
+
+@persistent("load_data")
+def _parse_data(columns, compact, row_metrics, version):
+    # Unused columns are skipped by the parser; prepare_rows always needs date and channel.
+    usecols = None
+    if columns is not None:
+        usecols = list(dict.fromkeys(["date", "channel"] + [c for c in columns if c != "date_day"]))
+    df = prepare_rows(pd.read_csv(DATA_PATH, parse_dates=["date"], usecols=usecols))
+    if columns is not None:
+        df = df[list(columns)]
+    return _finish_data(df, compact, row_metrics)
+
+
+def _finish_data(df, compact, row_metrics):
+    # Row-level ratios are opt-in; pages derive ratios from aggregates via rollup.
+    if row_metrics:
+        df = add_metrics(df)
+    if compact:
+        df = compact_frame(df)
+    return df
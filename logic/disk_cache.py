@@ -0,0 +1,155 @@
+import functools
+import glob
+import hashlib
+import importlib.metadata
+import os
+import pickle
+import threading
+
+DISK_CACHE_DIR = os.environ.get("ADS_DASHBOARD_DISK_CACHE_DIR", "data/.cache/results")
+# Total size of cached results kept on disk; 0 disables the persistent cache.
+DISK_CACHE_BYTES = int(float(os.environ.get("ADS_DASHBOARD_DISK_CACHE_MB", "1024")) * 1024 * 1024)
+
+# Libraries whose objects end up in pickled results; an upgrade may not unpickle old ones.
+PICKLE_LIBRARIES = ("pandas", "numpy", "pyarrow")
+
+_LOCK = threading.Lock()
+_STATS = {"hits": 0, "misses": 0, "evictions": 0, "skipped": 0}
+
+
+def _library_version(name):
+    # Read from the installed metadata, so pyarrow is not imported just to key the cache.
+    try:
+        return importlib.metadata.version(name)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+def _code_version():
+    # Any edit to the logic package, or a different pandas/numpy/pyarrow, invalidates
+    # every persisted result.
+    digest = hashlib.sha1()
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(__file__), "*.py"))):
+        with open(path, "rb") as fh:
+            digest.update(fh.read())
+    digest.update(repr([(name, _library_version(name)) for name in PICKLE_LIBRARIES]).encode())
+    return digest.hexdigest()[:16]
+
+
+CODE_VERSION = _code_version()
+
+
+def _entry_path(namespace, args):
+    # Callers pass normalized arguments (tuples, sorted selections, dataset version),
+    # so their repr is a stable key.
+    key = hashlib.sha1(repr((namespace, args, CODE_VERSION)).encode()).hexdigest()
+    return os.path.join(DISK_CACHE_DIR, f"{namespace}-{key}.pkl")
+
+
+def _read_entry(path):
+    try:
+        with open(path, "rb") as fh:
+            value = pickle.load(fh)
+        # The modification time doubles as the LRU timestamp.
+        os.utime(path)
+        return True, value
+    except FileNotFoundError:
+        return False, None
+    except Exception:
+        # Truncated files, and entries whose classes moved or changed (AttributeError,
+        # ImportError, TypeError, ...), are misses; the entry is rewritten.
+        _remove(path)
+        return False, None
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class _TooLarge(Exception):
+    pass
+
+
+class _BoundedWriter:
+    # Stops pickling as soon as the entry would not fit in the cache at all.
+    def __init__(self, fh, limit):
+        self.fh = fh
+        self.limit = limit
+        self.written = 0
+
+    def write(self, data):
+        self.written += memoryview(data).nbytes
+        if self.written > self.limit:
+            raise _TooLarge
+        return self.fh.write(data)
+
+
+def _write_entry(path, value):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(DISK_CACHE_DIR, exist_ok=True)
+        with open(tmp, "wb") as fh:
+            pickle.dump(value, _BoundedWriter(fh, DISK_CACHE_BYTES), protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except _TooLarge:
+        _remove(tmp)
+        with _LOCK:
+            _STATS["skipped"] += 1
+        return
+    except (OSError, pickle.PickleError):
+        _remove(tmp)
+        return
+    _evict()
+
+
+def _evict():
+    entries = []
+    for path in glob.glob(os.path.join(DISK_CACHE_DIR, "*.pkl")):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= DISK_CACHE_BYTES:
+            break
+        _remove(path)
+        total -= size
+        with _LOCK:
+            _STATS["evictions"] += 1
+
+
+def disk_cache_stats():
+    with _LOCK:
+        return dict(_STATS)
+
+
+def clear_disk_cache():
+    for path in glob.glob(os.path.join(DISK_CACHE_DIR, "*.pkl")):
+        _remove(path)
+
+
+# Persists results of func on disk so they survive server restarts. Sits beneath the
+# Streamlit caches: it is only consulted when the in-memory cache misses.
+def persistent(namespace):
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            if not DISK_CACHE_BYTES:
+                return func(*args)
+            path = _entry_path(namespace, args)
+            found, value = _read_entry(path)
+            with _LOCK:
+                _STATS["hits" if found else "misses"] += 1
+            if not found:
+                value = func(*args)
+                _write_entry(path, value)
+            return value
+
+        return wrapper
+
+    return decorate
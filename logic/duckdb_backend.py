@@ -0,0 +1,173 @@
+import functools
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from logic.cache import retire_versions
+from logic.filter_index import FILTER_KEYS
+from logic.metrics import ADDITIVE_COLUMNS, add_ratios
+
+# "duckdb" runs page aggregations in an embedded DuckDB; anything else keeps them in pandas.
+QUERY_BACKEND = os.environ.get("ADS_DASHBOARD_QUERY_BACKEND", "pandas").lower()
+# Encoded cubes kept for querying; each dataset version has one base cube per load mode.
+MAX_TABLES = 16
+
+_TABLES = OrderedDict()
+_TABLES_LOCK = threading.Lock()
+
+
+# Imported on first use so the pandas backend never pays for loading duckdb.
+@functools.lru_cache(maxsize=None)
+def _duckdb():
+    try:
+        import duckdb
+    except Exception:
+        return None
+    return duckdb
+
+
+def duckdb_enabled():
+    return QUERY_BACKEND == "duckdb" and _duckdb() is not None
+
+
+# Only frames that know which cached cube they were selected from (see share_frame) are
+# queried in DuckDB; anything else is aggregated in pandas.
+def supports(frame):
+    return getattr(frame, "source", None) is not None
+
+
+@st.cache_resource
+def _connection():
+    con = _duckdb().connect(database=":memory:")
+    con.execute(f"SET threads TO {os.cpu_count() or 1}")
+    return con
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _encode(frame):
+    # Dimensions are stored as sorted factorization codes: DuckDB groups and filters
+    # integers much faster than strings, and ordering by code orders by value.
+    import pyarrow as pa
+
+    arrays, uniques, missing = {}, {}, set()
+    for col in frame.columns:
+        if col in ADDITIVE_COLUMNS:
+            arrays[col] = pa.array(frame[col].to_numpy())
+            continue
+        codes, uniques[col] = pd.factorize(frame[col], sort=True)
+        codes = codes.astype(np.int32)
+        if (codes < 0).any():
+            missing.add(col)
+        arrays[col] = pa.array(codes)
+    positions = {
+        col: {str(value): i for i, value in enumerate(values)}
+        for col, values in uniques.items()
+        if col != "date_day"
+    }
+    # Filter-index cubes are sorted by day, so a date range is a zero-copy row slice.
+    days = None
+    if "date_day" in arrays and "date_day" not in missing:
+        days = arrays["date_day"].to_numpy()
+        if len(days) and (np.diff(days) < 0).any():
+            days = None
+    return {
+        "table": pa.table(arrays),
+        "uniques": uniques,
+        "positions": positions,
+        "missing": missing,
+        "days": days,
+    }
+
+
+def _table(frame):
+    # The cube a frame's rows came from is encoded once per dataset version and reused by
+    # every query on it; only the filters change between queries.
+    key, base, filters = frame.source
+    retire_versions("duckdb", key[0], _TABLES.clear)
+    with _TABLES_LOCK:
+        encoded = _TABLES.get(key)
+        if encoded is None:
+            encoded = _TABLES[key] = _encode(frame if base is None else base)
+            while len(_TABLES) > MAX_TABLES:
+                _TABLES.popitem(last=False)
+        else:
+            _TABLES.move_to_end(key)
+    return encoded, filters
+
+
+def _select(encoded, dims, filter_sets):
+    # Returns the rows to scan (the table, or a day slice of it) and the WHERE clause.
+    table = encoded["table"]
+    clauses = [f"{_quote(d)} >= 0" for d in dims if d in encoded["missing"]]
+    params = []
+    for filters in filter_sets:
+        if "date_range" in filters:
+            start_date, end_date = filters["date_range"]
+            days = encoded["uniques"]["date_day"]
+            stop = pd.Timestamp(end_date) + pd.Timedelta(days=1)
+            start, stop = int(days.searchsorted(pd.Timestamp(start_date))), int(days.searchsorted(stop))
+            if encoded["days"] is not None and table is encoded["table"]:
+                lo, hi = np.searchsorted(encoded["days"], [start, stop])
+                table = table.slice(lo, hi - lo)
+            else:
+                clauses.append('"date_day" >= ? AND "date_day" < ?')
+                params += [start, stop]
+        for key, col in FILTER_KEYS.items():
+            if filters.get(key) is None:
+                continue
+            positions = encoded["positions"][col]
+            selected = {positions[str(v)] for v in filters[key] if str(v) in positions}
+            if len(selected) == len(positions) and col not in encoded["missing"]:
+                continue
+            # Whichever side of the selection is smaller is bound, as one list. list_contains
+            # is evaluated by DuckDB itself; an IN list would be pushed into the Arrow scan,
+            # which is several times slower.
+            excluded = set(range(len(positions))) - selected
+            if len(selected) <= len(excluded):
+                clauses.append(f"list_contains(?, {_quote(col)})")
+                params.append(sorted(selected))
+            else:
+                clauses.append(f"{_quote(col)} >= 0 AND NOT list_contains(?, {_quote(col)})")
+                params.append(sorted(excluded))
+    return table, " AND ".join(clauses) or "TRUE", params
+
+
+def rollup(frame, dims, filters=None, columns=ADDITIVE_COLUMNS, metrics=()):
+    # Same contract as logic.metrics.rollup over the frame's rows, with filters applied
+    # as in query_cube. The frame itself is not scanned: the query runs on its source
+    # cube with the filters that selected the frame bound as parameters.
+    dims = list(dims)
+    encoded, source_filters = _table(frame)
+    columns = [c for c in columns if c in frame.columns]
+    sums = [
+        f"CAST(SUM({_quote(c)}) AS BIGINT) AS {_quote(c)}"
+        if pd.api.types.is_integer_dtype(frame[c])
+        else f"SUM({_quote(c)}) AS {_quote(c)}"
+        for c in columns
+    ]
+    table, where, params = _select(encoded, dims, [source_filters or {}, filters or {}])
+    group = ", ".join(_quote(d) for d in dims)
+    sql = f"SELECT {group}, {', '.join(sums)} FROM frame WHERE {where} GROUP BY {group}"
+
+    # Registering an Arrow table is zero-copy, so each query gets its own cursor.
+    con = _connection().cursor()
+    try:
+        con.register("frame", table)
+        result = con.execute(sql, params).df()
+    finally:
+        con.close()
+
+    # Groups come back unordered; sorting their codes orders them by value as groupby does.
+    codes = [result[d].to_numpy() for d in dims]
+    order = np.lexsort(codes[::-1])
+    out = pd.DataFrame({d: encoded["uniques"][d].take(c[order]) for d, c in zip(dims, codes)})
+    for c in columns:
+        out[c] = result[c].to_numpy()[order]
+    return add_ratios(out, metrics)
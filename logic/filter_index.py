@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+INDEX_DIMENSIONS = ("channel", "campaign_type", "product")
+# Sidebar selections as query_cube filter keys.
+FILTER_KEYS = {"channels": "channel", "campaign_types": "campaign_type", "products": "product"}
+# Dimensions with at most this many values get a precomputed boolean mask per value.
+BITMAP_MAX_VALUES = 16
+
+
+def build_filter_index(df, dims=INDEX_DIMENSIONS):
+    date_col = "date" if "date" in df.columns else "date_day"
+    frame = df.sort_values(date_col, kind="stable").reset_index(drop=True)
+
+    dimensions = {}
+    for col in dims:
+        codes, uniques = pd.factorize(frame[col], sort=True)
+        codes = codes.astype(np.min_scalar_type(max(len(uniques) - 1, 0)))
+        values = [str(v) for v in uniques]
+        masks = None
+        if len(values) <= BITMAP_MAX_VALUES:
+            masks = codes[None, :] == np.arange(len(values), dtype=codes.dtype)[:, None]
+        dimensions[col] = {
+            "values": values,
+            "positions": {v: i for i, v in enumerate(values)},
+            "codes": codes,
+            "masks": masks,
+        }
+
+    return {
+        "frame": frame,
+        "date_col": date_col,
+        "dates": frame[date_col].to_numpy(),
+        "dimensions": dimensions,
+    }
+
+
+def date_bounds(index):
+    dates = index["dates"]
+    return pd.Timestamp(dates[0]).date(), pd.Timestamp(dates[-1]).date()
+
+
+def _date_slice(index, start_date, end_date):
+    dates = index["dates"]
+    start = np.datetime64(start_date, "D").astype(dates.dtype)
+    stop = (np.datetime64(end_date, "D") + np.timedelta64(1, "D")).astype(dates.dtype)
+    return np.searchsorted(dates, start, side="left"), np.searchsorted(dates, stop, side="left")
+
+
+def _dimension_mask(dimension, selected, lo, hi):
+    positions = dimension["positions"]
+    selected = sorted({positions[v] for v in selected if v in positions})
+    n_values = len(positions)
+    if len(selected) == n_values:
+        return None
+
+    masks = dimension["masks"]
+    if masks is not None:
+        if not selected:
+            return np.zeros(hi - lo, dtype=bool)
+        # OR together whichever side of the selection is smaller.
+        if len(selected) <= n_values // 2:
+            return np.logical_or.reduce(masks[selected, lo:hi], axis=0)
+        excluded = sorted(set(range(n_values)) - set(selected))
+        return ~np.logical_or.reduce(masks[excluded, lo:hi], axis=0)
+
+    lookup = np.zeros(n_values, dtype=bool)
+    lookup[selected] = True
+    return lookup[dimension["codes"][lo:hi]]
+
+
+def filter_rows(index, date_range, selections, copy=True):
+    lo, hi = _date_slice(index, *date_range)
+    mask = None
+    for col, selected in selections.items():
+        dim_mask = _dimension_mask(index["dimensions"][col], selected, lo, hi)
+        if dim_mask is not None:
+            mask = dim_mask if mask is None else mask & dim_mask
+
+    rows = index["frame"].iloc[lo:hi]
+    if mask is not None:
+        rows = rows.loc[mask]
+    return rows.copy() if copy else rows
@@ -1,6 +1,24 @@
 
 import numpy as np
 
+from logic.profiling import profiled
+
+ADDITIVE_COLUMNS = ("impressions", "clicks", "add_to_cart", "orders", "cost", "revenue")
+
+# Ratios derived from additive sums as (numerator, denominator).
+RATIO_DEFINITIONS = {
+    "ctr": ("clicks", "impressions"),
+    "cvr": ("orders", "clicks"),
+    "roas": ("revenue", "cost"),
+    "cpc": ("cost", "clicks"),
+    "cpa": ("cost", "orders"),
+    "acos": ("cost", "revenue"),
+    "rpc": ("revenue", "clicks"),
+    "atc_rate": ("add_to_cart", "clicks"),
+    "checkout_rate": ("orders", "add_to_cart"),
+    "aov": ("revenue", "orders"),
+}
+
 
 def _safe_div(numerator, denominator, fill_value=0.0):
     numerator_arr = np.asarray(numerator, dtype=float)
@@ -22,3 +40,18 @@ def add_metrics(df):
         df["atc_rate"] = _safe_div(df["add_to_cart"], df["clicks"])
         df["checkout_rate"] = _safe_div(df["orders"], df["add_to_cart"])
     return df
+
+
+@profiled("rollup")
+def rollup(df, dims, metrics=(), columns=ADDITIVE_COLUMNS):
+    columns = [c for c in columns if c in df.columns]
+    out = df.groupby(list(dims), as_index=False, observed=True)[columns].sum()
+    return add_ratios(out, metrics)
+
+
+# Ratios are taken on the sums; a zero denominator yields NaN.
+def add_ratios(out, metrics):
+    for name in metrics:
+        numerator, denominator = RATIO_DEFINITIONS[name]
+        out[name] = _safe_div(out[numerator], out[denominator], fill_value=np.nan)
+    return out
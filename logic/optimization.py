@@ -1,12 +1,6 @@
+from logic.rules import OPTIMIZATION_FLAG_RULES, classify
+
 
 def optimization_flags(df, min_spend=25):
-    flags = []
-    for _, r in df.iterrows():
-        if r.cost > min_spend and r.orders == 0:
-            flags.append("NEGATIVE")
-        elif r.roas > 3 and r.campaign_type == "Auto":
-            flags.append("PROMOTE")
-        else:
-            flags.append("OK")
-    df["flag"] = flags
+    df["flag"] = classify(df, OPTIMIZATION_FLAG_RULES, min_spend=min_spend)
     return df
@@ -0,0 +1,115 @@
+import os
+import re
+import sys
+from datetime import date, timedelta
+
+import pandas as pd
+
+from logic.data import DATA_PATH, prepare_rows
+
+PARTITION_DIR = os.environ.get("ADS_DASHBOARD_PARTITION_DIR", "data/partitions")
+PARTITION_SUFFIXES = (".parquet", ".csv")
+# Rows are written sorted by these so Parquet row-group statistics can skip non-matching groups.
+PUSHDOWN_COLUMNS = ("channel", "campaign_type", "product")
+ROW_GROUP_ROWS = 64_000
+
+_PERIOD_PATTERN = re.compile(r"(\d{4})-(\d{2})(?:-(\d{2}))?")
+
+
+def _period_bounds(name):
+    match = _PERIOD_PATTERN.search(name)
+    if match is None:
+        return None
+    year, month, day = match.groups()
+    if day is not None:
+        start = date(int(year), int(month), int(day))
+        return start, start
+    start = date(int(year), int(month), 1)
+    next_month = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start, next_month - timedelta(days=1)
+
+
+def list_partitions(directory=PARTITION_DIR):
+    if not os.path.isdir(directory):
+        return []
+    partitions = []
+    for name in sorted(os.listdir(directory)):
+        bounds = _period_bounds(name)
+        if bounds is not None and name.endswith(PARTITION_SUFFIXES):
+            partitions.append({"path": os.path.join(directory, name), "start": bounds[0], "end": bounds[1]})
+    return partitions
+
+
+def partitioned_layout_available(directory=PARTITION_DIR):
+    return bool(list_partitions(directory))
+
+
+def partitions_version(directory=PARTITION_DIR):
+    stats = [os.stat(p["path"]) for p in list_partitions(directory)]
+    return tuple((s.st_mtime_ns, s.st_size) for s in stats)
+
+
+def partition_date_bounds(directory=PARTITION_DIR):
+    partitions = list_partitions(directory)
+    return partitions[0]["start"], max(p["end"] for p in partitions)
+
+
+def partition_dimension_values(directory=PARTITION_DIR, columns=PUSHDOWN_COLUMNS):
+    values = {col: set() for col in columns}
+    for partition in list_partitions(directory):
+        frame = _read_partition(partition["path"], list(columns))
+        for col in columns:
+            values[col].update(frame[col].dropna().astype(str).unique())
+    return {col: sorted(found) for col, found in values.items()}
+
+
+def _read_partition(path, columns, filters=None):
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, columns=columns, filters=filters or None)
+    # CSV partitions cannot skip rows, so filters are applied after parsing.
+    parse_dates = ["date"] if columns is None or "date" in columns else False
+    frame = pd.read_csv(path, usecols=columns, parse_dates=parse_dates)
+    for column, op, value in filters or []:
+        if op == "in":
+            frame = frame.loc[frame[column].isin(value)]
+        elif op == ">=":
+            frame = frame.loc[frame[column] >= value]
+        elif op == "<":
+            frame = frame.loc[frame[column] < value]
+    return frame
+
+
+def read_partitions(date_range, selections=None, columns=None, directory=PARTITION_DIR):
+    # Only partitions overlapping date_range are opened; dimension selections and the
+    # exact date bounds are pushed into the Parquet reader as row filters.
+    start_date, end_date = date_range
+    if columns is not None:
+        columns = list(dict.fromkeys(["date", "channel"] + list(columns)))
+    start = pd.Timestamp(start_date)
+    stop = pd.Timestamp(end_date) + pd.Timedelta(days=1)
+    filters = [("date", ">=", start), ("date", "<", stop)]
+    for col, selected in (selections or {}).items():
+        if selected is not None:
+            filters.append((col, "in", list(selected)))
+
+    partitions = list_partitions(directory)
+    overlapping = [p for p in partitions if p["start"] <= end_date and p["end"] >= start_date]
+    # With nothing overlapping, one filtered read still yields an empty frame with the right schema.
+    frames = [_read_partition(p["path"], columns, filters) for p in overlapping or partitions[:1]]
+    return prepare_rows(pd.concat(frames, ignore_index=True))
+
+
+def write_partitions(path=DATA_PATH, directory=PARTITION_DIR, freq="M"):
+    # Splits a raw export into one Parquet file per month ("M") or day ("D").
+    df = pd.read_csv(path, parse_dates=["date"])
+    os.makedirs(directory, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    label = "%Y-%m" if freq == "M" else "%Y-%m-%d"
+    for period, part in df.groupby(df["date"].dt.to_period(freq)):
+        part = part.sort_values(list(PUSHDOWN_COLUMNS) + ["date"], kind="stable")
+        target = os.path.join(directory, f"{stem}_{period.strftime(label)}.parquet")
+        part.to_parquet(target, index=False, row_group_size=ROW_GROUP_ROWS)
+
+
+if __name__ == "__main__":
+    write_partitions(*sys.argv[1:2])
@@ -0,0 +1,76 @@
+import logging
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from logic.filter_index import INDEX_DIMENSIONS
+from logic.metrics import ADDITIVE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# Indexes above this many cells (stored combination-days x metrics) are not built.
+PREFIX_MAX_CELLS = 20_000_000
+
+
+# Prefix sums are stored ragged: one entry per (combination, day) that has rows, ordered
+# by combination then day, so the index is never larger than the cube it is built from.
+# A combination's range total is the difference of the running sums at the two ends of
+# its entries inside the range.
+def build_prefix_index(cube, dims=INDEX_DIMENSIONS, columns=ADDITIVE_COLUMNS):
+    columns = [c for c in columns if c in cube.columns]
+    day_codes, days = pd.factorize(cube["date_day"], sort=True)
+    combo_codes, combos = pd.factorize(pd.MultiIndex.from_frame(cube[list(dims)].astype(str)))
+    keys, entries = np.unique(combo_codes.astype(np.int64) * len(days) + day_codes, return_inverse=True)
+    cells = (len(keys) + 1) * len(columns)
+    if cells > PREFIX_MAX_CELLS:
+        logger.warning(
+            "Prefix index needs %d cells, above PREFIX_MAX_CELLS=%d; KPI tiles will sum the filtered rows "
+            "and show no previous-period deltas",
+            cells,
+            PREFIX_MAX_CELLS,
+        )
+        return None
+
+    # Row 0 stays zero so a range total is cumulative[hi] - cumulative[lo].
+    sums = np.zeros((len(keys) + 1, len(columns)))
+    for i, col in enumerate(columns):
+        sums[1:, i] = np.bincount(entries, weights=cube[col].to_numpy(dtype=float), minlength=len(keys))
+    return {
+        "days": days.to_numpy().astype("datetime64[D]"),
+        "combos": {d: combos.get_level_values(i).to_numpy() for i, d in enumerate(dims)},
+        "keys": keys,
+        "cumulative": sums.cumsum(axis=0),
+        "columns": columns,
+        "integer": [pd.api.types.is_integer_dtype(cube[c]) for c in columns],
+    }
+
+
+def previous_range(date_range):
+    start_date, end_date = date_range
+    length = end_date - start_date + timedelta(days=1)
+    return start_date - length, start_date - timedelta(days=1)
+
+
+def range_totals(prefix, date_range, selections):
+    start_date, end_date = date_range
+    days = prefix["days"]
+    start = np.searchsorted(days, np.datetime64(start_date, "D"), side="left")
+    stop = np.searchsorted(days, np.datetime64(end_date, "D"), side="right")
+
+    combos = prefix["combos"]
+    mask = np.ones(len(next(iter(combos.values()))), dtype=bool)
+    for col, selected in selections.items():
+        if selected is not None:
+            mask &= np.isin(combos[col], [str(v) for v in selected])
+
+    # Each selected combination's entries in [start, stop) are one contiguous run.
+    base = np.flatnonzero(mask).astype(np.int64) * len(days)
+    lo = np.searchsorted(prefix["keys"], base + start)
+    hi = np.searchsorted(prefix["keys"], base + stop)
+    cumulative = prefix["cumulative"]
+    totals = (cumulative[hi] - cumulative[lo]).sum(axis=0)
+    return {
+        col: int(round(total)) if is_int else float(total)
+        for col, total, is_int in zip(prefix["columns"], totals, prefix["integer"])
+    }
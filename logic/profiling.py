@@ -0,0 +1,163 @@
+import functools
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Profile every rerun; without it a session opts in with the hidden ?profile=1 query parameter.
+PROFILE_DEFAULT = os.environ.get("ADS_DASHBOARD_PROFILE", "").lower() in ("1", "true", "yes")
+# When set, each profiled rerun appends its stages to this file as JSON lines.
+PROFILE_LOG = os.environ.get("ADS_DASHBOARD_PROFILE_LOG")
+
+# Each session's script runs in its own thread, so a rerun's stages are collected per thread.
+# Outside a profiled rerun records is None and every stage below is a no-op. Every run
+# starts with start_profiling (pages) or profiled_fragment (fragment-only reruns), which
+# drop whatever an earlier run on the thread left behind, e.g. one ended by st.stop().
+_RUN = threading.local()
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _rows(value):
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    return len(value) if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)) else None
+
+
+class _Stage:
+    def __init__(self, records, name, rows_in):
+        self.record = {"stage": name, "depth": _RUN.depth, "rows_in": rows_in, "rows_out": None}
+        records.append(self.record)
+
+    def out(self, value):
+        self.record["rows_out"] = _rows(value)
+
+    def __enter__(self):
+        _RUN.depth += 1
+        self.rss = _rss_bytes()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.record["seconds"] = time.perf_counter() - self.start
+        rss = _rss_bytes()
+        self.record["rss_delta_mb"] = None if rss is None or self.rss is None else (rss - self.rss) / 2**20
+        _RUN.depth -= 1
+        return False
+
+
+class _NoStage:
+    def out(self, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+# with stage("name", rows_in=len(df)) as s: ...; s.out(result)
+def stage(name, rows_in=None):
+    records = getattr(_RUN, "records", None)
+    if records is None:
+        return _NO_STAGE
+    return _Stage(records, name, rows_in)
+
+
+# Records a stage per call, taking rows in from the first argument and rows out from the result.
+def profiled(name):
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if getattr(_RUN, "records", None) is None:
+                return func(*args, **kwargs)
+            with stage(name, rows_in=_rows(args[0]) if args else None) as s:
+                result = func(*args, **kwargs)
+                s.out(result)
+            return result
+
+        return wrapper
+
+    return decorate
+
+
+def start_profiling(page):
+    enabled = PROFILE_DEFAULT or st.query_params.get("profile", "").lower() in ("1", "true", "yes")
+    _RUN.records = [] if enabled else None
+    _RUN.depth = 0
+    _RUN.page = page
+    _RUN.start = time.perf_counter()
+    return enabled
+
+
+def _fragment_rerun():
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return bool(ctx is not None and ctx.fragment_ids_this_run)
+
+
+# Goes under @st.fragment. When the fragment reruns on its own, the page script (and its
+# start_profiling/show_profile) does not run, so the fragment profiles itself and renders
+# its breakdown inside the fragment. As part of a full run it records into the page's run.
+def profiled_fragment(page):
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _fragment_rerun():
+                return func(*args, **kwargs)
+            start_profiling(f"{page} ({func.__name__})")
+            result = func(*args, **kwargs)
+            show_profile()
+            return result
+
+        return wrapper
+
+    return decorate
+
+
+def show_profile():
+    records = getattr(_RUN, "records", None)
+    if records is None:
+        return
+    # Stop recording first so the breakdown's own rendering is not part of it.
+    _RUN.records = None
+    total = time.perf_counter() - _RUN.start
+
+    if PROFILE_LOG:
+        run = {"page": _RUN.page, "time": time.time(), "total_seconds": total}
+        with open(PROFILE_LOG, "a") as fh:
+            for record in records:
+                fh.write(json.dumps(dict(run, **record)) + "\n")
+
+    table = pd.DataFrame(records, columns=["stage", "depth", "seconds", "rows_in", "rows_out", "rss_delta_mb"])
+    # Nested stages are indented under the stage that called them.
+    table["stage"] = ["· " * depth + name for depth, name in zip(table["depth"], table["stage"])]
+    table["ms"] = table["seconds"] * 1000
+    table["share"] = table["seconds"] / total * 100 if total else 0.0
+    with st.expander(f"Timing breakdown: {total * 1000:,.0f} ms"):
+        st.dataframe(
+            table[["stage", "ms", "share", "rows_in", "rows_out", "rss_delta_mb"]],
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "ms": st.column_config.NumberColumn(format="%.1f"),
+                "share": st.column_config.NumberColumn("% of rerun", format="%.0f%%"),
+                "rows_in": st.column_config.NumberColumn(format="%d"),
+                "rows_out": st.column_config.NumberColumn(format="%d"),
+                "rss_delta_mb": st.column_config.NumberColumn("RSS delta (MB)", format="%.1f"),
+            },
+        )
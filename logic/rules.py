@@ -0,0 +1,95 @@
+import operator
+from collections import namedtuple
+
+import numpy as np
+
+from logic.profiling import profiled
+
+# Threshold resolved at evaluation time from the params passed to classify().
+Param = namedtuple("Param", ["name", "scale"], defaults=[1.0])
+
+OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+# Each rule is (clauses, label); clauses are ANDed (column, op, threshold)
+# triples and the first matching rule wins. An empty clause list always matches.
+OPTIMIZATION_FLAG_RULES = [
+    ([("cost", ">", Param("min_spend")), ("orders", "==", 0)], "NEGATIVE"),
+    ([("roas", ">", 3), ("campaign_type", "==", "Auto")], "PROMOTE"),
+    ([], "OK"),
+]
+
+CAMPAIGN_SEGMENT_RULES = [
+    ([("cost", ">=", Param("volume_cut")), ("eff_score", ">=", Param("eff_cut"))], "Scale"),
+    ([("cost", ">=", Param("volume_cut"))], "Optimize"),
+    ([("eff_score", ">=", Param("eff_cut"))], "Test"),
+    ([], "Pause"),
+]
+
+CAMPAIGN_ACTION_RULES = [
+    ([("segment", "==", "Scale")], "Increase budget 10-20%"),
+    ([("segment", "==", "Optimize")], "Reduce bids and tighten targeting"),
+    ([("segment", "==", "Test")], "Try new creatives and audience expansion"),
+    ([], "Pause or keep minimal learning budget"),
+]
+
+CHANNEL_QUALITY_RULES = [
+    ([("ctr", ">=", Param("ctr_median")), ("cvr", ">=", Param("cvr_median"))], "Scale budget"),
+    ([("ctr", ">=", Param("ctr_median")), ("cvr", "<", Param("cvr_median"))], "Fix landing page / offer"),
+    ([("ctr", "<", Param("ctr_median")), ("cvr", ">=", Param("cvr_median"))], "Improve creatives"),
+    ([], "Refine targeting"),
+]
+
+CHANNEL_EFFICIENCY_RULES = [
+    (
+        [("roas", ">=", Param("target_roas", 1.1)), ("cpc", "<=", Param("avg_cpc", 1.05))],
+        "Scale",
+    ),
+    (
+        [("roas", "<", Param("target_roas", 0.9)), ("cpc", ">", Param("avg_cpc", 1.1))],
+        "Fix cost + quality",
+    ),
+    ([("roas", "<", Param("target_roas", 0.9))], "Fix conversion"),
+    ([("cpc", ">", Param("avg_cpc", 1.1))], "Tighten bids"),
+    ([], "Maintain/Test"),
+]
+
+AUTO_TERM_RULES = [
+    (
+        [
+            ("cost", ">=", Param("min_spend")),
+            ("orders", ">=", Param("min_orders")),
+            ("roas", ">=", Param("target_roas")),
+        ],
+        "PROMOTE_TO_MANUAL",
+    ),
+    ([("cost", ">=", Param("min_spend")), ("orders", "==", 0)], "NEGATE"),
+    ([("ctr", ">=", Param("ctr_median")), ("cvr", "<", Param("cvr_median"))], "FIX_LANDING"),
+    ([], "KEEP_RUNNING"),
+]
+
+
+def _threshold(value, params):
+    if isinstance(value, Param):
+        return params[value.name] * value.scale
+    return value
+
+
+def _condition(df, clauses, params):
+    mask = np.ones(len(df), dtype=bool)
+    for column, op, value in clauses:
+        mask &= np.asarray(OPERATORS[op](df[column], _threshold(value, params)), dtype=bool)
+    return mask
+
+
+@profiled("classify")
+def classify(df, rules, default=None, **params):
+    conditions = [_condition(df, clauses, params) for clauses, _ in rules]
+    labels = [label for _, label in rules]
+    return np.select(conditions, labels, default=default)
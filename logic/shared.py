@@ -0,0 +1,138 @@
+import functools
+
+import numpy as np
+import pandas as pd
+
+# DataFrame methods that take inplace=True. Several of them (fillna, replace, where,
+# mask, ...) write into the column buffers before _update_inplace is reached.
+INPLACE_METHODS = (
+    "bfill",
+    "clip",
+    "drop",
+    "drop_duplicates",
+    "dropna",
+    "eval",
+    "ffill",
+    "fillna",
+    "interpolate",
+    "mask",
+    "query",
+    "rename",
+    "rename_axis",
+    "replace",
+    "reset_index",
+    "set_index",
+    "sort_index",
+    "sort_values",
+    "where",
+)
+
+
+class SharedFrameError(RuntimeError):
+    pass
+
+
+def _read_only(name):
+    def method(self, *args, **kwargs):
+        raise SharedFrameError(
+            f"{name} would modify a frame shared by every session; call .copy() first and modify the copy"
+        )
+
+    return method
+
+
+def _guard_inplace(name):
+    method = getattr(pd.DataFrame, name)
+
+    @functools.wraps(method)
+    def guarded(self, *args, **kwargs):
+        if kwargs.get("inplace"):
+            _read_only(f"{name}(inplace=True)")(self)
+        return method(self, *args, **kwargs)
+
+    return guarded
+
+
+class _ReadOnlyIndexer:
+    def __init__(self, indexer, name):
+        self._indexer = indexer
+        self._name = name
+
+    def __getitem__(self, key):
+        return self._indexer[key]
+
+    def __call__(self, axis=None):
+        return _ReadOnlyIndexer(self._indexer(axis), self._name)
+
+    def __setitem__(self, key, value):
+        _read_only(f".{self._name}[...] assignment")(self)
+
+
+# A frame held once per process (st.cache_resource) and handed to every session as is.
+# Column assignment, inplace=True methods and indexer writes raise SharedFrameError;
+# numpy-backed columns are also read-only at the array level. Anything derived from it
+# (slices, groupbys, .copy()) is a plain DataFrame.
+class SharedFrame(pd.DataFrame):
+    # Where the rows came from, as (key, base, filters): the rows of base matching the
+    # query_cube filters, or the whole frame itself when base is None. key identifies
+    # base, starting with its dataset version. Derived frames do not inherit it.
+    _metadata = ["source"]
+    source = None
+
+    @property
+    def _constructor(self):
+        return pd.DataFrame
+
+    __setitem__ = _read_only("Column assignment")
+    __delitem__ = _read_only("Column deletion")
+    insert = _read_only("insert()")
+    isetitem = _read_only("isetitem()")
+    _update_inplace = _read_only("inplace=True")
+
+    def __setattr__(self, name, value):
+        if name in ("columns", "index") or (name == "_mgr" and "_mgr" in self.__dict__):
+            _read_only(f"Setting .{name}")(self)
+        super().__setattr__(name, value)
+
+    @property
+    def loc(self):
+        return _ReadOnlyIndexer(super().loc, "loc")
+
+    @property
+    def iloc(self):
+        return _ReadOnlyIndexer(super().iloc, "iloc")
+
+    @property
+    def at(self):
+        return _ReadOnlyIndexer(super().at, "at")
+
+    @property
+    def iat(self):
+        return _ReadOnlyIndexer(super().iat, "iat")
+
+
+for _name in INPLACE_METHODS:
+    setattr(SharedFrame, _name, _guard_inplace(_name))
+
+
+def share_frame(df, source=None):
+    # Wraps the existing column buffers without copying them.
+    if isinstance(df, SharedFrame):
+        return df
+    columns = {}
+    for col in df.columns:
+        values = df[col].array
+        if isinstance(values, pd.arrays.NumpyExtensionArray):
+            values = values.to_numpy()
+            values.flags.writeable = False
+        else:
+            # Datetime and categorical arrays write through to their numpy buffers
+            # (categorical codes); Arrow-backed arrays are immutable already.
+            for attr in ("_ndarray", "_data", "_mask"):
+                buffer = getattr(values, attr, None)
+                if isinstance(buffer, np.ndarray):
+                    buffer.flags.writeable = False
+        columns[col] = values
+    shared = SharedFrame(columns, index=df.index, copy=False)
+    shared.source = source
+    return shared
@@ -0,0 +1,51 @@
+import pandas as pd
+import streamlit as st
+
+from logic.profiling import stage
+from logic.shared import share_frame
+
+
+def _token(value):
+    # Inputs are compared between reruns, so lists, sets and dicts become tuples.
+    if isinstance(value, dict):
+        return tuple((key, _token(value[key])) for key in sorted(value))
+    if isinstance(value, (list, tuple)):
+        return tuple(_token(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(value))
+    return value
+
+
+def _share(value):
+    # Results are reused across reruns, so frames are handed out read-only.
+    if isinstance(value, pd.DataFrame):
+        return share_frame(value)
+    if isinstance(value, tuple):
+        return tuple(_share(item) for item in value)
+    return value
+
+
+# Per-session dependency graph of a page's computations. Each stage names the upstream
+# stages and page inputs (filters, dataset version) it reads plus any scalar inputs
+# (targets, thresholds), and is recomputed only when one of those changes; otherwise the
+# result from the previous rerun is returned. A stage's key includes its upstream keys,
+# so a change propagates to everything downstream of it. One result is kept per stage.
+#
+#   stages = PageStages("Keywords", data=data_inputs(filters))
+#   kw = stages.run("keywords", lambda: query_cube(df, ["keyword"]), "data")
+#   flags = stages.run("negate", lambda: negate(kw, target), "keywords", target=target)
+class PageStages:
+    def __init__(self, page, **inputs):
+        self._results = st.session_state.setdefault(f"_stages:{page}", {})
+        self._keys = {name: _token(value) for name, value in inputs.items()}
+
+    def run(self, name, compute, *depends, **inputs):
+        key = tuple(self._keys[dep] for dep in depends) + _token(inputs)
+        cached = self._results.get(name)
+        if cached is None or cached[0] != key:
+            with stage(f"stage: {name}") as s:
+                value = _share(compute())
+                s.out(value)
+            cached = self._results[name] = (key, value)
+        self._keys[name] = (name, key)
+        return cached[1]
@@ -0,0 +1,103 @@
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import streamlit as st
+
+from logic.cube import load_prefix_index
+from logic.ui import altair, warm_filtered_cube
+
+# Cube dimensions used by the overview and the four pages.
+PAGE_DIMENSIONS = (("channel",), ("campaign",), ("campaign", "keyword"), ("product", "category"))
+WARMUP_ENABLED = os.environ.get("ADS_DASHBOARD_WARMUP", "1").lower() not in ("0", "false", "no")
+# Seconds a fresh interpreter may spend importing the dashboard's logic modules; enforced
+# by tests/test_startup.py.
+IMPORT_BUDGET_SECONDS = 3.0
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WARMUP_THREAD = "ads-dashboard-warmup"
+
+logger = logging.getLogger(__name__)
+
+_FIRST_RUN = time.perf_counter()
+TIMINGS = {}
+
+
+def startup_timings():
+    return dict(TIMINGS)
+
+
+def _timed(name, func, *args):
+    start = time.perf_counter()
+    func(*args)
+    TIMINGS[name] = time.perf_counter() - start
+
+
+def warm_caches():
+    # Same cache keys as the pages' first run, so a user arriving mid-warmup waits on
+    # the in-flight computation instead of starting a second one.
+    try:
+        for dims in PAGE_DIMENSIONS:
+            _timed("cube:" + ",".join(dims), warm_filtered_cube, dims)
+        _timed("prefix_index", load_prefix_index)
+        _timed("altair", altair)
+    except Exception:
+        logger.exception("Cache warmup failed; pages will compute on first use")
+        return
+    TIMINGS["ready"] = time.perf_counter() - _FIRST_RUN
+    logger.info("Caches warm %.2fs after first run: %s", TIMINGS["ready"], TIMINGS)
+
+
+class _SkipWarmupThread(logging.Filter):
+    def filter(self, record):
+        return record.threadName != WARMUP_THREAD
+
+
+# Runs once per server process; every page calls it so any entry URL starts the warmup.
+@st.cache_resource(show_spinner=False)
+def start_warmup():
+    if not WARMUP_ENABLED:
+        return None
+    # The warmup has no session, which Streamlit would otherwise warn about on every cache call.
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(_SkipWarmupThread())
+    thread = threading.Thread(target=warm_caches, name=WARMUP_THREAD, daemon=True)
+    thread.start()
+    return thread
+
+
+def measure_import_time(repeat=1):
+    # Timed in a fresh interpreter so modules already imported here do not hide the cost.
+    # The fastest of repeat runs is returned; the first may also pay for a cold disk.
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import logic.cube, logic.metrics, logic.rules, logic.startup, logic.ui\n"
+        "print(time.perf_counter() - start, 'altair' in sys.modules, 'duckdb' in sys.modules)\n"
+    )
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.split()
+        runs.append((float(out[0]), {"altair": out[1] == "True", "duckdb": out[2] == "True"}))
+    return min(runs, key=lambda run: run[0])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the dashboard's import-time budget.")
+    parser.add_argument("--budget", type=float, default=IMPORT_BUDGET_SECONDS, help="seconds")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    seconds, eager = measure_import_time(args.repeat)
+    print(f"logic imports: {seconds:.2f}s (budget {args.budget:.2f}s)")
+    failures = [f"{name} is imported eagerly" for name, loaded in eager.items() if loaded]
+    if seconds > args.budget:
+        failures.append("import time over budget")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,193 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from logic.data import DATA_PATH
+
+CHANNELS = ("Amazon", "Google", "Facebook", "TikTok")
+CAMPAIGN_TYPES = ("Auto", "Manual")
+MATCH_TYPES = ("Exact", "Phrase", "Broad")
+
+# Per-channel funnel: mean impressions per row, CTR, CPC, add-to-cart rate and checkout rate.
+CHANNEL_PROFILES = {
+    "Amazon": (2400, 0.032, 0.95, 0.22, 0.42),
+    "Google": (3200, 0.028, 1.10, 0.16, 0.36),
+    "Facebook": (5200, 0.014, 0.65, 0.10, 0.30),
+    "TikTok": (6800, 0.011, 0.45, 0.08, 0.25),
+}
+DEFAULT_PROFILE = (3000, 0.02, 0.8, 0.12, 0.33)
+MATCH_TYPE_CTR = {"Exact": 1.35, "Phrase": 1.0, "Broad": 0.7}
+
+
+def _zipf_weights(n, exponent):
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _catalog(rng, channels, n_campaigns, n_keywords, n_products, n_categories, keyword_skew):
+    products = np.array([f"SKU_{i}" for i in range(1, n_products + 1)], dtype=object)
+    categories = np.array([f"Cat_{i}" for i in range(1, n_categories + 1)], dtype=object)
+    product_category = categories[rng.integers(0, n_categories, n_products)]
+    product_price = rng.lognormal(np.log(35), 0.45, n_products)
+
+    # Campaigns target one product on one channel; their traffic share is lognormal.
+    channels = np.asarray(channels, dtype=object)
+    campaign_channel = rng.integers(0, len(channels), n_campaigns)
+    campaign_type = rng.integers(0, len(CAMPAIGN_TYPES), n_campaigns)
+    campaign_product = rng.integers(0, n_products, n_campaigns)
+    campaign_names = np.array(
+        [
+            f"{channels[c]}_{CAMPAIGN_TYPES[t]}_{products[p]}_{i}"
+            for i, (c, t, p) in enumerate(zip(campaign_channel, campaign_type, campaign_product), start=1)
+        ],
+        dtype=object,
+    )
+    campaign_weight = rng.lognormal(0, 1.0, n_campaigns)
+
+    # Each campaign has its own quality, so ROAS differs between campaigns rather than rows.
+    campaign_quality = rng.lognormal(0, 0.35, n_campaigns)
+    return {
+        "channels": channels,
+        "products": products,
+        "product_category": product_category,
+        "product_price": product_price,
+        "campaign_channel": campaign_channel,
+        "campaign_type": campaign_type,
+        "campaign_product": campaign_product,
+        "campaign_names": campaign_names,
+        "campaign_p": campaign_weight / campaign_weight.sum(),
+        "campaign_quality": campaign_quality,
+        "keywords": np.array([f"keyword_{i}" for i in range(1, n_keywords + 1)], dtype=object),
+        "keyword_p": _zipf_weights(n_keywords, keyword_skew),
+        "keyword_quality": rng.lognormal(0, 0.3, n_keywords),
+    }
+
+
+def _rows(rng, catalog, n, day_start, day_stop, start):
+    campaign = rng.choice(len(catalog["campaign_p"]), n, p=catalog["campaign_p"])
+    keyword = rng.choice(len(catalog["keyword_p"]), n, p=catalog["keyword_p"])
+    match = rng.choice(len(MATCH_TYPES), n, p=(0.35, 0.4, 0.25))
+    channel_code = catalog["campaign_channel"][campaign]
+    product = catalog["campaign_product"][campaign]
+
+    profiles = np.array([CHANNEL_PROFILES.get(c, DEFAULT_PROFILE) for c in catalog["channels"]])[channel_code]
+    mean_imp, ctr, cpc, atc_rate, checkout = profiles.T
+    quality = catalog["campaign_quality"][campaign] * catalog["keyword_quality"][keyword]
+
+    impressions = rng.poisson(mean_imp * rng.lognormal(0, 0.6, n))
+    ctr = np.clip(ctr * np.array([MATCH_TYPE_CTR[m] for m in MATCH_TYPES])[match] * quality, 0, 0.5)
+    clicks = rng.binomial(impressions, ctr)
+    add_to_cart = rng.binomial(clicks, np.clip(atc_rate * quality, 0, 0.9))
+    orders = rng.binomial(add_to_cart, np.clip(checkout * np.sqrt(quality), 0, 0.95))
+    cost = np.round(clicks * cpc * rng.lognormal(0, 0.25, n), 2)
+    revenue = np.round(orders * catalog["product_price"][product] * rng.lognormal(0, 0.15, n), 2)
+
+    seconds = rng.integers(day_start * 86400, day_stop * 86400, n)
+    seconds.sort()
+    return pd.DataFrame(
+        {
+            "date": pd.Timestamp(start) + pd.to_timedelta(seconds, unit="s"),
+            "channel": catalog["channels"][channel_code],
+            "campaign_type": np.asarray(CAMPAIGN_TYPES, dtype=object)[catalog["campaign_type"][campaign]],
+            "campaign": catalog["campaign_names"][campaign],
+            "keyword": catalog["keywords"][keyword],
+            "match_type": np.asarray(MATCH_TYPES, dtype=object)[match],
+            "product": catalog["products"][product],
+            "category": catalog["product_category"][product],
+            "impressions": impressions,
+            "clicks": clicks,
+            "add_to_cart": add_to_cart,
+            "orders": orders,
+            "cost": cost,
+            "revenue": revenue,
+        }
+    )
+
+
+# Yields the dataset in date-ordered chunks so 50M-row exports never sit in memory at once.
+# Each chunk covers its own slice of days and draws from its own seeded stream.
+def generate_chunks(
+    rows,
+    days=365,
+    start="2025-01-01",
+    channels=CHANNELS,
+    n_campaigns=200,
+    n_keywords=5000,
+    n_products=60,
+    n_categories=8,
+    keyword_skew=1.1,
+    seed=42,
+    chunk_rows=1_000_000,
+):
+    seeds = np.random.SeedSequence(seed)
+    catalog = _catalog(
+        np.random.default_rng(seeds.spawn(1)[0]),
+        channels,
+        n_campaigns,
+        n_keywords,
+        n_products,
+        n_categories,
+        keyword_skew,
+    )
+    n_chunks = max(1, -(-rows // chunk_rows))
+    bounds = np.linspace(0, days, n_chunks + 1).round().astype(int)
+    sizes = np.diff(np.linspace(0, rows, n_chunks + 1).round().astype(int))
+    for chunk_seed, size, day_start, day_stop in zip(seeds.spawn(n_chunks), sizes, bounds[:-1], bounds[1:]):
+        if size:
+            rng = np.random.default_rng(chunk_seed)
+            yield _rows(rng, catalog, size, day_start, max(day_stop, day_start + 1), start)
+
+
+def generate_data(rows, **options):
+    return pd.concat(generate_chunks(rows, **options), ignore_index=True)
+
+
+def write_data(path=DATA_PATH, rows=100_000, **options):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    for i, chunk in enumerate(generate_chunks(rows, **options)):
+        chunk.to_csv(tmp, mode="w" if i == 0 else "a", header=i == 0, index=False)
+    os.replace(tmp, path)
+    return path
+
+
+def _count(text):
+    # Accepts 10k, 2.5m, 50M or plain integers.
+    text = str(text).lower().replace("_", "")
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic ads dataset.")
+    parser.add_argument("--rows", type=_count, default=100_000)
+    parser.add_argument("--out", default=DATA_PATH)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--start", default="2025-01-01")
+    parser.add_argument("--channels", default=",".join(CHANNELS))
+    parser.add_argument("--campaigns", type=int, default=200)
+    parser.add_argument("--keywords", type=int, default=5000)
+    parser.add_argument("--products", type=int, default=60)
+    parser.add_argument("--categories", type=int, default=8)
+    parser.add_argument("--keyword-skew", type=float, default=1.1, help="Zipf exponent of keyword traffic")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-rows", type=_count, default=1_000_000)
+    args = parser.parse_args()
+
+    write_data(
+        args.out,
+        args.rows,
+        days=args.days,
+        start=args.start,
+        channels=tuple(c.strip() for c in args.channels.split(",") if c.strip()),
+        n_campaigns=args.campaigns,
+        n_keywords=args.keywords,
+        n_products=args.products,
+        n_categories=args.categories,
+        keyword_skew=args.keyword_skew,
+        seed=args.seed,
+        chunk_rows=args.chunk_rows,
+    )
+    print(f"Wrote {args.rows:,} rows to {args.out}")
@@ -1,56 +1,268 @@
+import functools
+import math
+import os
+
+import numpy as np
+import pandas as pd
 import streamlit as st
 
+from logic.cache import LRUCache, retire_versions
+from logic.cube import (
+    CUBE_DIMENSIONS,
+    FILTER_DIMENSIONS,
+    build_cube,
+    load_filter_index,
+    load_partition_cube,
+    load_prefix_index,
+)
+from logic.data import COMPACT_DEFAULT, compact_frame, dataset_version, frame_bytes
+from logic.filter_index import FILTER_KEYS, build_filter_index, date_bounds, filter_rows
+from logic.metrics import ADDITIVE_COLUMNS
+from logic.partitions import (
+    partition_date_bounds,
+    partition_dimension_values,
+    partitioned_layout_available,
+    partitions_version,
+)
+from logic.prefix_index import previous_range, range_totals
+from logic.profiling import profiled, stage
+from logic.shared import share_frame
+
+# Keep table columns numeric and format them in the browser via column configs.
+NUMERIC_TABLES = os.environ.get("ADS_DASHBOARD_NUMERIC_TABLES", "").lower() in ("1", "true", "yes")
+
+# Filtered frames shared by every page and session in this process.
+FILTER_CACHE = LRUCache(
+    max_entries=int(os.environ.get("ADS_DASHBOARD_FILTER_CACHE_ENTRIES", "32")),
+    max_bytes=int(float(os.environ.get("ADS_DASHBOARD_FILTER_CACHE_MB", "512")) * 1024 * 1024),
+    sizeof=frame_bytes,
+)
+
+
+# Chart-only dependency, imported on first chart render (or by the startup warmup).
+@functools.lru_cache(maxsize=None)
+def altair():
+    try:
+        import altair as alt
+    except Exception:
+        return None
+    return alt
+
+
+def filter_cache_stats():
+    return FILTER_CACHE.stats()
+
+
+def _filter_key(index, date_range, selections):
+    version = index.get("version")
+    if version is None:
+        return None
+    return (version, tuple(date_range)) + tuple(
+        (col, tuple(sorted(selections[col]))) for col in sorted(selections)
+    )
+
+
+def _cached(key, compute):
+    # Keys start with the base cube's (dataset version, dims, compact).
+    retire_versions("filter_rows", key[0][0], FILTER_CACHE.clear)
+    return FILTER_CACHE.get_or_compute(key, compute)
+
+
+# A page's cube, summed from filtered rows of the base cube. The projection is cached
+# under the base frame's key plus the page dimensions, so every page filters the base
+# cube once per sidebar selection and only derives its own grain from it.
+def _page_cube(base, key, dims, compact):
+    dims = tuple(dict.fromkeys(FILTER_DIMENSIONS + tuple(dims)))
+
+    def compute():
+        cube = build_cube(base, dims)
+        if COMPACT_DEFAULT if compact is None else compact:
+            cube = compact_frame(cube)
+        # Queried in DuckDB on the base cube, with the filters that selected base.
+        source = None
+        if base.source is not None:
+            base_key, base_frame, filters = base.source
+            source = (base_key, base if base_frame is None else base_frame, filters)
+        return share_frame(cube, source=source)
+
+    if key is None:
+        return compute()
+    return _cached(key + (("dims", dims),), compute)
+
+
+def _cached_filter_rows(index, date_range, selections, copy, dims=None):
+    key = _filter_key(index, date_range, selections)
+
+    def compute():
+        # The frame records the cube and filters it was selected with, so the DuckDB
+        # backend can query the cube instead of scanning the frame.
+        source = None
+        if key is not None:
+            filters = {name: selections[col] for name, col in FILTER_KEYS.items() if col in selections}
+            source = (index["version"], index["frame"], dict(filters, date_range=tuple(date_range)))
+        return share_frame(filter_rows(index, date_range, selections, copy=False), source=source)
 
-def apply_sidebar_filters(df):
+    filtered = compute() if key is None else _cached(key, compute)
+    if dims is not None:
+        filtered = _page_cube(filtered, key, dims, index["version"][2] if key else None)
+    # Cached frames are shared read-only, so callers that mutate get their own copy.
+    return filtered.copy() if copy else filtered
+
+
+# Renders the three target inputs into the sidebar, or side by side into st.columns(3).
+def target_inputs(columns=None):
+    roas_col, acos_col, cpa_col = columns or (st.sidebar,) * 3
+    return {
+        "target_roas": roas_col.number_input("Target ROAS", min_value=0.5, value=2.8, step=0.1),
+        "target_acos": acos_col.number_input("Target ACOS", min_value=0.05, value=0.35, step=0.05),
+        "target_cpa": cpa_col.number_input("Target CPA (€)", min_value=5.0, value=25.0, step=1.0),
+    }
+
+
+def _sidebar_inputs(min_date, max_date, channels, campaign_types, products, targets=True):
     st.sidebar.header("Filters")
 
-    min_date = df["date"].min().date()
-    max_date = df["date"].max().date()
     date_range = st.sidebar.date_input("Date range", (min_date, max_date))
     if not isinstance(date_range, (list, tuple)) or len(date_range) != 2:
         date_range = (min_date, max_date)
 
-    channels = sorted(df["channel"].unique().tolist())
     channel_sel = st.sidebar.multiselect("Channel", channels, default=channels)
     if not channel_sel:
         channel_sel = channels
 
-    campaign_types = sorted(df["campaign_type"].unique().tolist())
     campaign_type_sel = st.sidebar.multiselect(
         "Campaign type", campaign_types, default=campaign_types
     )
     if not campaign_type_sel:
         campaign_type_sel = campaign_types
 
-    products = sorted(df["product"].unique().tolist())
     product_sel = st.sidebar.multiselect("Product", products, default=products)
     if not product_sel:
         product_sel = products
 
-    st.sidebar.header("Targets")
-    target_roas = st.sidebar.number_input("Target ROAS", min_value=0.5, value=2.8, step=0.1)
-    target_acos = st.sidebar.number_input("Target ACOS", min_value=0.05, value=0.35, step=0.05)
-    target_cpa = st.sidebar.number_input("Target CPA (€)", min_value=5.0, value=25.0, step=1.0)
-
-    start_date, end_date = date_range
-    mask = (
-        (df["date"].dt.date >= start_date)
-        & (df["date"].dt.date <= end_date)
-        & (df["channel"].isin(channel_sel))
-        & (df["campaign_type"].isin(campaign_type_sel))
-        & (df["product"].isin(product_sel))
-    )
-
-    filtered = df.loc[mask].copy()
-    return filtered, {
-        "date_range": (start_date, end_date),
+    filters = {
+        "date_range": tuple(date_range),
         "channels": channel_sel,
         "campaign_types": campaign_type_sel,
         "products": product_sel,
-        "target_roas": target_roas,
-        "target_acos": target_acos,
-        "target_cpa": target_cpa,
     }
+    # Pages that render the targets inside a fragment pass targets=False, so nudging a
+    # target reruns only that fragment instead of the whole script.
+    if targets:
+        st.sidebar.header("Targets")
+        filters.update(target_inputs())
+    return filters
+
+
+def _selections(filters):
+    return {
+        "channel": filters["channels"],
+        "campaign_type": filters["campaign_types"],
+        "product": filters["products"],
+    }
+
+
+# What the frame load_filtered_cube returned depends on: the dataset version and the
+# sidebar selections. Pages key their PageStages on it.
+def data_inputs(filters):
+    version = partitions_version() if partitioned_layout_available() else dataset_version()
+    return (version, tuple(filters["date_range"]), _selections(filters))
+
+
+@profiled("apply_sidebar_filters")
+def apply_sidebar_filters(df, index=None, copy=True, targets=True, dims=None):
+    if index is None:
+        index = build_filter_index(df)
+    dimensions = index["dimensions"]
+
+    min_date, max_date = date_bounds(index)
+    filters = _sidebar_inputs(
+        min_date,
+        max_date,
+        dimensions["channel"]["values"],
+        dimensions["campaign_type"]["values"],
+        dimensions["product"]["values"],
+        targets=targets,
+    )
+    filtered = _cached_filter_rows(index, filters["date_range"], _selections(filters), copy, dims=dims)
+    return filtered, filters
+
+
+@profiled("load_filtered_cube")
+def load_filtered_cube(dims, compact=None, targets=True):
+    # Every page filters the same base cube, so switching pages with unchanged filters
+    # reuses the filtered rows. With a date-partitioned layout the sidebar selections are
+    # pushed down to the partition reader; otherwise the base cube is loaded once and indexed.
+    if not partitioned_layout_available():
+        index = load_filter_index(dims=CUBE_DIMENSIONS, compact=compact)
+        return apply_sidebar_filters(index["frame"], index=index, copy=False, targets=targets, dims=dims)
+
+    values = _partition_options(partitions_version())
+    min_date, max_date = partition_date_bounds()
+    filters = _sidebar_inputs(
+        min_date, max_date, values["channel"], values["campaign_type"], values["product"], targets=targets
+    )
+    selections = {
+        col: (None if len(selected) == len(values[col]) else selected)
+        for col, selected in _selections(filters).items()
+    }
+    return _partition_page_cube(dims, filters["date_range"], selections, compact), filters
+
+
+def _partition_page_cube(dims, date_range, selections, compact):
+    base = load_partition_cube(CUBE_DIMENSIONS, date_range, selections, compact=compact)
+    return _page_cube(base, (base.source[0],), dims, compact)
+
+
+@st.cache_data(max_entries=4)
+def _partition_options(version):
+    return partition_dimension_values()
+
+
+# Computes what load_filtered_cube returns for the default sidebar state (full date
+# range, everything selected) without rendering widgets, so a background thread can warm it.
+def warm_filtered_cube(dims, compact=None):
+    if not partitioned_layout_available():
+        index = load_filter_index(dims=CUBE_DIMENSIONS, compact=compact)
+        selections = {col: index["dimensions"][col]["values"] for col in ("channel", "campaign_type", "product")}
+        return _cached_filter_rows(index, date_bounds(index), selections, copy=False, dims=dims)
+
+    _partition_options(partitions_version())
+    selections = {"channel": None, "campaign_type": None, "product": None}
+    return _partition_page_cube(dims, partition_date_bounds(), selections, compact)
+
+
+# KPI totals for the sidebar period and the equal-length period before it, read from
+# the prefix-sum index. Falls back to summing df (with no previous period) when the
+# index is too large to build.
+@profiled("load_period_totals")
+def load_period_totals(df, filters):
+    prefix = load_prefix_index()
+    if prefix is None:
+        return {col: df[col].sum() for col in ADDITIVE_COLUMNS if col in df.columns}, None
+    selections = _selections(filters)
+    current = range_totals(prefix, filters["date_range"], selections)
+    previous = range_totals(prefix, previous_range(filters["date_range"]), selections)
+    return current, previous
+
+
+# st.metric delta versus the previous period: relative change, or percentage points
+# for rates. None (no delta shown) when there is nothing to compare against.
+def period_delta(current, previous, numerator, denominator=None, points=False):
+    if previous is None:
+        return None
+
+    def value(totals):
+        if denominator is None:
+            return totals[numerator]
+        return totals[numerator] / totals[denominator] if totals[denominator] else None
+
+    now, before = value(current), value(previous)
+    if now is None or not before:
+        return None
+    if points:
+        return f"{(now - before) * 100:+.2f} pp vs prev. period"
+    return f"{now / before - 1:+.1%} vs prev. period"
 
 
 def format_k(value, currency=False):
@@ -86,3 +298,134 @@ def format_float(value, decimals=2):
         return f"{num:.{decimals}f}"
     except Exception:
         return value
+
+
+# Vectorized counterparts of the scalar formatters above; outputs match them cell for cell.
+def _as_float_array(values):
+    return pd.Series(values).to_numpy(dtype=float, na_value=np.nan)
+
+
+def _with_missing(num, formatted, values):
+    out = np.where(np.isnan(num), "-", formatted)
+    return pd.Series(out, index=getattr(values, "index", None), dtype=object)
+
+
+def format_k_series(values, currency=False):
+    num = _as_float_array(values)
+    with np.errstate(invalid="ignore"):
+        large = np.abs(num) >= 1000
+    formatted = np.where(large, np.char.mod("%.1fk", num / 1000), np.char.mod("%.0f", num))
+    if currency:
+        formatted = np.char.add("€", formatted)
+    return _with_missing(num, formatted, values)
+
+
+def format_pct_series(values, decimals=1):
+    num = _as_float_array(values)
+    return _with_missing(num, np.char.mod(f"%.{decimals}f%%", num * 100), values)
+
+
+def format_float_series(values, decimals=2):
+    num = _as_float_array(values)
+    return _with_missing(num, np.char.mod(f"%.{decimals}f", num), values)
+
+
+def _parse_format(spec):
+    kind, *args = spec if isinstance(spec, tuple) else (spec,)
+    return kind, (args[0] if args else None)
+
+
+def _format_column(values, spec):
+    kind, decimals = _parse_format(spec)
+    if kind == "count":
+        return format_k_series(values)
+    if kind == "currency":
+        return format_k_series(values, currency=True)
+    if kind == "pct":
+        return format_pct_series(values, 1 if decimals is None else decimals)
+    return format_float_series(values, 2 if decimals is None else decimals)
+
+
+def _column_config(values, spec):
+    kind, decimals = _parse_format(spec)
+    if kind == "count":
+        return values, st.column_config.NumberColumn(format="%d")
+    if kind == "currency":
+        return values, st.column_config.NumberColumn(format="€%.0f")
+    if kind == "pct":
+        decimals = 1 if decimals is None else decimals
+        return values * 100, st.column_config.NumberColumn(format=f"%.{decimals}f%%")
+    decimals = 2 if decimals is None else decimals
+    return values, st.column_config.NumberColumn(format=f"%.{decimals}f")
+
+
+# formats maps column -> "count", "currency", ("pct", decimals) or ("float", decimals).
+# In numeric mode values stay numbers and the returned column configs format them.
+@profiled("format_table")
+def format_table(df, formats, numeric=None):
+    if numeric is None:
+        numeric = NUMERIC_TABLES
+    out = df.copy()
+    column_config = {}
+    for col, spec in formats.items():
+        if col not in out.columns:
+            continue
+        if numeric:
+            out[col], column_config[col] = _column_config(out[col], spec)
+        else:
+            out[col] = _format_column(out[col], spec)
+    return out, column_config
+
+
+# Sorts, searches and pages on the server so only the visible rows are formatted and serialized.
+@profiled("paginated_table")
+def paginated_table(
+    df,
+    formats,
+    key,
+    search_column=None,
+    highlight_column=None,
+    highlight_style="background-color: #ffe6e6",
+    sort_by=None,
+    ascending=False,
+    page_sizes=(25, 50, 100, 250),
+):
+    columns = [c for c in df.columns if c != highlight_column]
+    controls = st.columns(4)
+    query = ""
+    if search_column:
+        query = controls[0].text_input(f"Search {search_column}", key=f"{key}_search").strip()
+    sort_col = controls[1].selectbox(
+        "Sort by", columns, index=columns.index(sort_by) if sort_by in columns else 0, key=f"{key}_sort"
+    )
+    order = controls[2].selectbox(
+        "Order", ["Descending", "Ascending"], index=1 if ascending else 0, key=f"{key}_order"
+    )
+    page_size = controls[3].selectbox("Rows per page", page_sizes, index=min(1, len(page_sizes) - 1), key=f"{key}_size")
+
+    rows = df
+    if query:
+        matches = rows[search_column].astype(str).str.contains(query, case=False, regex=False)
+        rows = rows.loc[matches.to_numpy(dtype=bool)]
+    rows = rows.sort_values(sort_col, ascending=order == "Ascending", kind="stable", na_position="last")
+
+    n_rows = len(rows)
+    n_pages = max(1, math.ceil(n_rows / page_size))
+    page = st.number_input(f"Page (of {n_pages:,})", min_value=1, value=1, step=1, key=f"{key}_page")
+    page = min(int(page), n_pages)
+    start = (page - 1) * page_size
+    page_rows = rows.iloc[start : start + page_size]
+
+    display, column_config = format_table(page_rows[columns], formats)
+    if highlight_column:
+        flags = page_rows[highlight_column].to_numpy(dtype=bool)
+        cells = np.repeat(np.where(flags, highlight_style, "")[:, None], display.shape[1], axis=1)
+        styles = pd.DataFrame(cells, index=display.index, columns=display.columns)
+        display = display.style.apply(lambda _: styles, axis=None)
+
+    with stage("st.dataframe", rows_in=len(page_rows)):
+        st.dataframe(display, use_container_width=True, column_config=column_config)
+    if n_rows:
+        st.caption(f"Rows {start + 1:,}-{start + len(page_rows):,} of {n_rows:,}")
+    else:
+        st.caption("No matching rows.")
@@ -1,30 +1,32 @@
 import pandas as pd
 import streamlit as st
 
-from logic.data import load_data
-from logic.ui import apply_sidebar_filters, format_float, format_k, format_pct
+from logic.charts import downsample_series, fold_series
+from logic.cube import query_cube
+from logic.rules import CHANNEL_QUALITY_RULES, classify
+from logic.profiling import show_profile, stage, start_profiling
+from logic.startup import start_warmup
+from logic.ui import altair, format_k, format_pct, format_table, load_filtered_cube, load_period_totals, period_delta
 
-try:
-    import altair as alt
-except Exception:
-    alt = None
 
-
-df = load_data()
-df, filters = apply_sidebar_filters(df)
+start_warmup()
+start_profiling("Executive")
+df, filters = load_filtered_cube(dims=("channel",))
 
 st.header("Executive Overview")
 
 if df.empty:
     st.warning("No data for the current filters.")
+    show_profile()
     st.stop()
 
-spend = df["cost"].sum()
-revenue = df["revenue"].sum()
-impressions = df["impressions"].sum()
-clicks = df["clicks"].sum()
-orders = df["orders"].sum()
-add_to_cart = df["add_to_cart"].sum() if "add_to_cart" in df.columns else 0
+totals, previous = load_period_totals(df, filters)
+spend = totals["cost"]
+revenue = totals["revenue"]
+impressions = totals["impressions"]
+clicks = totals["clicks"]
+orders = totals["orders"]
+add_to_cart = totals.get("add_to_cart", 0)
 
 roas = revenue / spend if spend else 0
 ctr = clicks / impressions if impressions else 0
@@ -34,22 +36,34 @@ cpa = spend / orders if orders else float("nan")
 atc_rate = add_to_cart / clicks if clicks and add_to_cart else 0
 
 kpi_row = st.columns(6)
-kpi_row[0].metric("Spend", format_k(spend, currency=True))
-kpi_row[1].metric("Revenue", format_k(revenue, currency=True))
+kpi_row[0].metric("Spend", format_k(spend, currency=True), delta=period_delta(totals, previous, "cost"))
+kpi_row[1].metric("Revenue", format_k(revenue, currency=True), delta=period_delta(totals, previous, "revenue"))
 kpi_row[2].metric("ROAS", f"{roas:.2f}", delta=f"{roas - filters['target_roas']:+.2f}")
-kpi_row[3].metric("CTR", format_pct(ctr, 2))
-kpi_row[4].metric("CVR", format_pct(cvr, 2))
-kpi_row[5].metric("CPA", format_k(cpa, currency=True) if cpa == cpa else "-")
+kpi_row[3].metric(
+    "CTR", format_pct(ctr, 2), delta=period_delta(totals, previous, "clicks", "impressions", points=True)
+)
+kpi_row[4].metric("CVR", format_pct(cvr, 2), delta=period_delta(totals, previous, "orders", "clicks", points=True))
+kpi_row[5].metric(
+    "CPA",
+    format_k(cpa, currency=True) if cpa == cpa else "-",
+    delta=period_delta(totals, previous, "cost", "orders"),
+    delta_color="inverse",
+)
 
 sub_row = st.columns(3)
-sub_row[0].metric("Clicks", format_k(clicks))
-sub_row[1].metric("Add to Cart Rate", format_pct(atc_rate, 2))
-sub_row[2].metric("CPC", f"EUR {cpc:,.2f}")
+sub_row[0].metric("Clicks", format_k(clicks), delta=period_delta(totals, previous, "clicks"))
+sub_row[1].metric(
+    "Add to Cart Rate",
+    format_pct(atc_rate, 2),
+    delta=period_delta(totals, previous, "add_to_cart", "clicks", points=True) if "add_to_cart" in totals else None,
+)
+sub_row[2].metric(
+    "CPC", f"EUR {cpc:,.2f}", delta=period_delta(totals, previous, "cost", "clicks"), delta_color="inverse"
+)
 
-trend = (
-    df.groupby("date_day", as_index=False)[["cost", "revenue", "impressions", "clicks", "orders"]].sum()
+trend = query_cube(
+    df, ["date_day"], columns=["cost", "revenue", "impressions", "clicks", "orders"], metrics=["roas"]
 )
-trend["roas"] = trend["revenue"] / trend["cost"].replace(0, float("nan"))
 trend["roas"] = trend["roas"].fillna(0)
 trend["roas_7d"] = trend["roas"].rolling(7, min_periods=1).mean()
 
@@ -60,15 +74,20 @@ st.caption(
     "If spend and revenue rise together with stable or improving ROAS, scaling is usually justified. "
     "Action: investigate any sustained ROAS downtrend before increasing budget."
 )
+alt = altair()
 if alt:
     max_money = max(trend["cost"].max(), trend["revenue"].max()) * 1.1
     max_roas = max(trend["roas_7d"].max(), 1.0) * 1.15
 
-    base = alt.Chart(trend).encode(x=alt.X("date_day:T", title="Date"))
+    chart_trend = downsample_series(trend, "date_day", ["cost", "revenue", "roas_7d"])
+    # The spend/revenue fold and the ROAS line are evaluated here, so each layer only
+    # ships the columns it draws.
+    money = fold_series(chart_trend, "date_day", ["cost", "revenue"], key="metric", value="value")
     money_layer = (
-        base.transform_fold(["cost", "revenue"], as_=["metric", "value"])
+        alt.Chart(money)
         .mark_line(interpolate="monotone", strokeWidth=2.2)
         .encode(
+            x=alt.X("date_day:T", title="Date"),
             y=alt.Y(
                 "value:Q",
                 title="Spend / Revenue (EUR)",
@@ -83,8 +102,10 @@ if alt:
         )
     )
     roas_layer = (
-        base.mark_line(color="#7a0177", strokeWidth=2, interpolate="monotone", strokeDash=[6, 4])
+        alt.Chart(chart_trend[["date_day", "roas_7d"]])
+        .mark_line(color="#7a0177", strokeWidth=2, interpolate="monotone", strokeDash=[6, 4])
         .encode(
+            x=alt.X("date_day:T", title="Date"),
             y=alt.Y(
                 "roas_7d:Q",
                 title="ROAS (7d)",
@@ -94,40 +115,19 @@ if alt:
             tooltip=[alt.Tooltip("roas_7d:Q", title="ROAS 7d", format=".2f")],
         )
     )
-    st.altair_chart(alt.layer(money_layer, roas_layer).resolve_scale(y="independent"), use_container_width=True)
+    with stage("chart: Spend, Revenue, and ROAS"):
+        st.altair_chart(alt.layer(money_layer, roas_layer).resolve_scale(y="independent"), use_container_width=True)
 else:
     st.line_chart(trend.set_index("date_day")[["cost", "revenue", "roas_7d"]])
 
-channel = (
-    df.groupby("channel", as_index=False)[
-        ["impressions", "clicks", "add_to_cart", "orders", "cost", "revenue"]
-    ]
-    .sum()
-    .sort_values("cost", ascending=False)
-)
-channel["ctr"] = channel["clicks"] / channel["impressions"].replace(0, float("nan"))
-channel["cvr"] = channel["orders"] / channel["clicks"].replace(0, float("nan"))
-channel["atc_rate"] = channel["add_to_cart"] / channel["clicks"].replace(0, float("nan"))
-channel["roas"] = channel["revenue"] / channel["cost"].replace(0, float("nan"))
-channel["cpc"] = channel["cost"] / channel["clicks"].replace(0, float("nan"))
-channel["cpa"] = channel["cost"] / channel["orders"].replace(0, float("nan"))
+channel = query_cube(
+    df, ["channel"], metrics=["ctr", "cvr", "atc_rate", "roas", "cpc", "cpa"]
+).sort_values("cost", ascending=False)
 channel = channel.fillna(0)
 
 ctr_median = channel["ctr"].median()
 cvr_median = channel["cvr"].median()
-
-
-def _channel_action(row):
-    if row["ctr"] >= ctr_median and row["cvr"] >= cvr_median:
-        return "Scale budget"
-    if row["ctr"] >= ctr_median and row["cvr"] < cvr_median:
-        return "Fix landing page / offer"
-    if row["ctr"] < ctr_median and row["cvr"] >= cvr_median:
-        return "Improve creatives"
-    return "Refine targeting"
-
-
-channel["action"] = channel.apply(_channel_action, axis=1)
+channel["action"] = classify(channel, CHANNEL_QUALITY_RULES, ctr_median=ctr_median, cvr_median=cvr_median)
 
 st.subheader("Channel Quality Matrix (CTR vs CVR)")
 st.caption(
@@ -156,17 +156,25 @@ if alt:
     )
     vline = alt.Chart(pd.DataFrame({"ctr_median": [ctr_median]})).mark_rule(color="#666").encode(x="ctr_median:Q")
     hline = alt.Chart(pd.DataFrame({"cvr_median": [cvr_median]})).mark_rule(color="#666").encode(y="cvr_median:Q")
-    st.altair_chart((points + vline + hline), use_container_width=True)
+    with stage("chart: Channel Quality Matrix (CTR vs CVR)"):
+        st.altair_chart((points + vline + hline), use_container_width=True)
 else:
     st.scatter_chart(channel, x="ctr", y="cvr")
 
-display = channel[["channel", "cost", "revenue", "roas", "ctr", "atc_rate", "cvr", "cpc", "cpa", "action"]].copy()
-display["cost"] = display["cost"].apply(lambda v: format_k(v, currency=True))
-display["revenue"] = display["revenue"].apply(lambda v: format_k(v, currency=True))
-display["roas"] = display["roas"].apply(lambda v: format_float(v, 2))
-display["ctr"] = display["ctr"].apply(lambda v: format_pct(v, 2))
-display["atc_rate"] = display["atc_rate"].apply(lambda v: format_pct(v, 2))
-display["cvr"] = display["cvr"].apply(lambda v: format_pct(v, 2))
-display["cpc"] = display["cpc"].apply(lambda v: format_float(v, 2))
-display["cpa"] = display["cpa"].apply(lambda v: format_float(v, 2))
-st.dataframe(display, use_container_width=True)
+display, column_config = format_table(
+    channel[["channel", "cost", "revenue", "roas", "ctr", "atc_rate", "cvr", "cpc", "cpa", "action"]],
+    {
+        "cost": "currency",
+        "revenue": "currency",
+        "roas": ("float", 2),
+        "ctr": ("pct", 2),
+        "atc_rate": ("pct", 2),
+        "cvr": ("pct", 2),
+        "cpc": ("float", 2),
+        "cpa": ("float", 2),
+    },
+)
+with stage("table: Channel Quality Matrix (CTR vs CVR)"):
+    st.dataframe(display, use_container_width=True, column_config=column_config)
+
+show_profile()
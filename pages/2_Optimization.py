@@ -2,69 +2,63 @@ import numpy as np
 import pandas as pd
 import streamlit as st
 
-from logic.data import load_data
-from logic.ui import apply_sidebar_filters, format_float, format_k, format_pct
+from logic.charts import count_rows
+from logic.cube import query_cube
+from logic.metrics import rollup
+from logic.rules import CAMPAIGN_ACTION_RULES, CAMPAIGN_SEGMENT_RULES, classify
+from logic.profiling import profiled_fragment, show_profile, stage, start_profiling
+from logic.stages import PageStages
+from logic.startup import start_warmup
+from logic.ui import altair, data_inputs, format_table, load_filtered_cube, target_inputs
 
-try:
-    import altair as alt
-except Exception:
-    alt = None
 
-
-df = load_data()
-df, filters = apply_sidebar_filters(df)
+start_warmup()
+start_profiling("Optimization")
+df, filters = load_filtered_cube(dims=("campaign",), targets=False)
 
 st.header("Optimization Potential")
 
 if df.empty:
     st.warning("No data for the current filters.")
+    show_profile()
     st.stop()
 
-campaign = (
-    df.groupby(["campaign", "channel", "campaign_type"], as_index=False)[
-        ["impressions", "clicks", "add_to_cart", "orders", "cost", "revenue"]
-    ]
-    .sum()
-)
 
-campaign["ctr"] = campaign["clicks"] / campaign["impressions"].replace(0, np.nan)
-campaign["cvr"] = campaign["orders"] / campaign["clicks"].replace(0, np.nan)
-campaign["roas"] = campaign["revenue"] / campaign["cost"].replace(0, np.nan)
-campaign["cpc"] = campaign["cost"] / campaign["clicks"].replace(0, np.nan)
-campaign["cpa"] = campaign["cost"] / campaign["orders"].replace(0, np.nan)
-campaign["eff_score"] = (campaign["roas"] * 0.55) + (campaign["cvr"] * 100 * 0.35) - (campaign["cpc"] * 0.1)
-campaign = campaign.replace([np.inf, -np.inf], np.nan).fillna(0)
+def campaign_scores(df):
+    campaign = query_cube(
+        df, ["campaign", "channel", "campaign_type"], metrics=["ctr", "cvr", "roas", "cpc", "cpa"]
+    )
+    campaign["eff_score"] = (campaign["roas"] * 0.55) + (campaign["cvr"] * 100 * 0.35) - (campaign["cpc"] * 0.1)
+    return campaign.replace([np.inf, -np.inf], np.nan).fillna(0)
+
 
-volume_cut = campaign["cost"].median()
-eff_cut = campaign["eff_score"].median()
+def segment_campaigns(campaign):
+    campaign = campaign.copy()
+    volume_cut = campaign["cost"].median()
+    eff_cut = campaign["eff_score"].median()
 
+    campaign["segment"] = classify(campaign, CAMPAIGN_SEGMENT_RULES, volume_cut=volume_cut, eff_cut=eff_cut)
+    campaign["action"] = classify(campaign, CAMPAIGN_ACTION_RULES)
+    return campaign, volume_cut, eff_cut
 
-def _segment(row):
-    high_volume = row["cost"] >= volume_cut
-    high_eff = row["eff_score"] >= eff_cut
-    if high_volume and high_eff:
-        return "Scale"
-    if high_volume and not high_eff:
-        return "Optimize"
-    if not high_volume and high_eff:
-        return "Test"
-    return "Pause"
 
+def segment_spend(campaign):
+    segment_mix = rollup(campaign, ["segment"], columns=["cost", "revenue"])
+    segment_mix["spend_share"] = segment_mix["cost"] / segment_mix["cost"].sum()
+    return segment_mix
 
-def _action(row):
-    if row["segment"] == "Scale":
-        return "Increase budget 10-20%"
-    if row["segment"] == "Optimize":
-        return "Reduce bids and tighten targeting"
-    if row["segment"] == "Test":
-        return "Try new creatives and audience expansion"
-    return "Pause or keep minimal learning budget"
 
+def prioritize(campaign, target_roas):
+    priority = (campaign["cost"] * (target_roas - campaign["roas"])).clip(lower=0)
+    return campaign.assign(priority=priority).sort_values(["priority", "cost"], ascending=[False, False])
 
-campaign["segment"] = campaign.apply(_segment, axis=1)
-campaign["action"] = campaign.apply(_action, axis=1)
-campaign["priority"] = (campaign["cost"] * (filters["target_roas"] - campaign["roas"])).clip(lower=0)
 
+# Only the ranking stage reads the targets; the aggregation and segmentation are reused
+# until the filters or the dataset change.
+stages = PageStages("Optimization", data=data_inputs(filters))
+scores = stages.run("campaign", lambda: campaign_scores(df), "data")
+campaign, volume_cut, eff_cut = stages.run("segments", lambda: segment_campaigns(scores), "campaign")
+segment_mix = stages.run("segment_mix", lambda: segment_spend(campaign), "segments")
 
 st.subheader("Budget Reallocation Matrix")
 st.caption(
@@ -73,6 +67,7 @@ st.caption(
     "Top-right is best for scaling, top-left is usually where budget leaks, bottom-right is where controlled tests can be expanded, and bottom-left is pause/contain territory. "
     "Action: use this chart to decide where incremental budget should come from and where it should go."
 )
+alt = altair()
 if alt:
     x_min = campaign["eff_score"].min() * 0.9
     x_max = campaign["eff_score"].max() * 1.1
@@ -102,13 +97,11 @@ if alt:
     )
     vline = alt.Chart(pd.DataFrame({"eff_cut": [eff_cut]})).mark_rule(color="#666").encode(x="eff_cut:Q")
     hline = alt.Chart(pd.DataFrame({"volume_cut": [volume_cut]})).mark_rule(color="#666").encode(y="volume_cut:Q")
-    st.altair_chart(points + vline + hline, use_container_width=True)
+    with stage("chart: Budget Reallocation Matrix"):
+        st.altair_chart(points + vline + hline, use_container_width=True)
 else:
     st.scatter_chart(campaign, x="eff_score", y="cost")
 
-segment_mix = campaign.groupby("segment", as_index=False)[["cost", "revenue"]].sum()
-segment_mix["spend_share"] = segment_mix["cost"] / segment_mix["cost"].sum()
-
 left, right = st.columns(2)
 with left:
     st.subheader("Spend Share by Segment")
@@ -128,7 +121,8 @@ with left:
                 tooltip=["segment", "cost", "revenue", "spend_share"],
             )
         )
-        st.altair_chart(chart, use_container_width=True)
+        with stage("chart: Spend Share by Segment"):
+            st.altair_chart(chart, use_container_width=True)
     else:
         st.bar_chart(segment_mix.set_index("segment")["spend_share"])
 
@@ -140,46 +134,66 @@ with right:
         "Action: use count plus spend share together to separate many-small issues from few-high-impact issues."
     )
     if alt:
+        # Counted here rather than with count(), so four rows are sent instead of every campaign.
         chart = (
-            alt.Chart(campaign)
+            alt.Chart(count_rows(campaign, "segment", as_="campaigns"))
             .mark_bar(color="#4c78a8")
             .encode(
                 x=alt.X("segment:N", title="Segment"),
-                y=alt.Y("count():Q", title="Campaign Count"),
+                y=alt.Y("campaigns:Q", title="Campaign Count"),
             )
         )
-        st.altair_chart(chart, use_container_width=True)
+        with stage("chart: Segment Count"):
+            st.altair_chart(chart, use_container_width=True)
     else:
-        st.dataframe(campaign["segment"].value_counts())
-
-st.subheader("Actionable Campaign Table")
-action_table = campaign.sort_values(["priority", "cost"], ascending=[False, False]).copy()
-action_table["cost"] = action_table["cost"].apply(lambda v: format_k(v, currency=True))
-action_table["revenue"] = action_table["revenue"].apply(lambda v: format_k(v, currency=True))
-action_table["roas"] = action_table["roas"].apply(lambda v: format_float(v, 2))
-action_table["ctr"] = action_table["ctr"].apply(lambda v: format_pct(v, 2))
-action_table["cvr"] = action_table["cvr"].apply(lambda v: format_pct(v, 2))
-action_table["cpc"] = action_table["cpc"].apply(lambda v: format_float(v, 2))
-action_table["cpa"] = action_table["cpa"].apply(lambda v: format_float(v, 2))
-action_table["priority"] = action_table["priority"].apply(lambda v: format_k(v, currency=True))
-
-st.dataframe(
-    action_table[
-        [
-            "campaign",
-            "channel",
-            "campaign_type",
-            "segment",
-            "action",
-            "cost",
-            "revenue",
-            "roas",
-            "ctr",
-            "cvr",
-            "cpc",
-            "cpa",
-            "priority",
-        ]
-    ],
-    use_container_width=True,
-)
+        with stage("table: Segment Count"):
+            st.dataframe(campaign["segment"].value_counts())
+
+
+# Only the priority ranking depends on the targets, so they are rendered here and a
+# target change reruns this fragment alone.
+@st.fragment
+@profiled_fragment("Optimization")
+def actionable_campaigns(stages, campaign):
+    st.subheader("Actionable Campaign Table")
+    targets = target_inputs(st.columns(3))
+    target_roas = targets["target_roas"]
+    action_table = stages.run(
+        "priority", lambda: prioritize(campaign, target_roas), "segments", target_roas=target_roas
+    )
+    action_table, column_config = format_table(
+        action_table[
+            [
+                "campaign",
+                "channel",
+                "campaign_type",
+                "segment",
+                "action",
+                "cost",
+                "revenue",
+                "roas",
+                "ctr",
+                "cvr",
+                "cpc",
+                "cpa",
+                "priority",
+            ]
+        ],
+        {
+            "cost": "currency",
+            "revenue": "currency",
+            "roas": ("float", 2),
+            "ctr": ("pct", 2),
+            "cvr": ("pct", 2),
+            "cpc": ("float", 2),
+            "cpa": ("float", 2),
+            "priority": "currency",
+        },
+    )
+    with stage("table: Actionable Campaign Table"):
+        st.dataframe(action_table, use_container_width=True, column_config=column_config)
+
+
+actionable_campaigns(stages, campaign)
+
+show_profile()
@@ -2,48 +2,50 @@ import numpy as np
 import pandas as pd
 import streamlit as st
 
-from logic.data import load_data
-from logic.ui import apply_sidebar_filters, format_float, format_k, format_pct
+from logic.charts import collapse_categories, downsample_series
+from logic.cube import query_cube
+from logic.profiling import show_profile, stage, start_profiling
+from logic.startup import start_warmup
+from logic.ui import altair, format_k, format_pct, format_table, load_filtered_cube, load_period_totals, period_delta
 
-try:
-    import altair as alt
-except Exception:
-    alt = None
 
-
-df = load_data()
-df, _filters = apply_sidebar_filters(df)
+start_warmup()
+start_profiling("Sales")
+df, filters = load_filtered_cube(dims=("product", "category"))
 
 st.header("Sales Outcomes")
 
 if df.empty:
     st.warning("No data for the current filters.")
+    show_profile()
     st.stop()
 
-revenue = df["revenue"].sum()
-orders = df["orders"].sum()
+totals, previous = load_period_totals(df, filters)
+revenue = totals["revenue"]
+orders = totals["orders"]
 aov = revenue / orders if orders else 0
-atc = df["add_to_cart"].sum() if "add_to_cart" in df.columns else 0
+atc = totals.get("add_to_cart", 0)
 checkout_rate = orders / atc if atc else 0
 
-daily = df.groupby("date_day", as_index=False)[["orders", "revenue"]].sum()
-daily["aov"] = daily["revenue"] / daily["orders"].replace(0, np.nan)
+daily = query_cube(df, ["date_day"], columns=["orders", "revenue"], metrics=["aov"])
 daily["aov"] = daily["aov"].fillna(0)
 daily["orders_7d"] = daily["orders"].rolling(7, min_periods=1).mean()
 
-prod = (
-    df.groupby(["product", "category"], as_index=False)[["orders", "revenue"]]
-    .sum()
-    .sort_values("revenue", ascending=False)
+prod = query_cube(df, ["product", "category"], columns=["orders", "revenue"]).sort_values(
+    "revenue", ascending=False
 )
 prod["rev_share"] = prod["revenue"] / prod["revenue"].sum()
 top5_share = prod.head(5)["rev_share"].sum()
 
 kpis = st.columns(5)
-kpis[0].metric("Revenue", format_k(revenue, currency=True))
-kpis[1].metric("Orders", format_k(orders))
-kpis[2].metric("AOV", f"EUR {aov:,.2f}")
-kpis[3].metric("Checkout Rate", format_pct(checkout_rate, 2))
+kpis[0].metric("Revenue", format_k(revenue, currency=True), delta=period_delta(totals, previous, "revenue"))
+kpis[1].metric("Orders", format_k(orders), delta=period_delta(totals, previous, "orders"))
+kpis[2].metric("AOV", f"EUR {aov:,.2f}", delta=period_delta(totals, previous, "revenue", "orders"))
+kpis[3].metric(
+    "Checkout Rate",
+    format_pct(checkout_rate, 2),
+    delta=period_delta(totals, previous, "orders", "add_to_cart", points=True) if "add_to_cart" in totals else None,
+)
 kpis[4].metric("Top 5 Product Share", format_pct(top5_share, 1))
 
 st.subheader("Order Volume and AOV")
@@ -53,10 +55,12 @@ st.caption(
     "Rising AOV with weak order growth suggests premium mix strength but possible top-of-funnel limits. "
     "Action: use this view to decide whether to prioritize volume campaigns or value/mix optimization."
 )
+alt = altair()
 if alt:
     max_orders = max(daily["orders_7d"].max(), 1) * 1.15
     max_aov = max(daily["aov"].max(), 1) * 1.15
-    base = alt.Chart(daily).encode(x=alt.X("date_day:T", title="Date"))
+    chart_daily = downsample_series(daily, "date_day", ["orders_7d", "aov"])
+    base = alt.Chart(chart_daily).encode(x=alt.X("date_day:T", title="Date"))
     orders_line = (
         base.mark_line(color="#1f77b4", strokeWidth=2.2, interpolate="monotone")
         .encode(
@@ -76,12 +80,14 @@ if alt:
             tooltip=["aov"],
         )
     )
-    st.altair_chart(alt.layer(orders_line, aov_line).resolve_scale(y="independent"), use_container_width=True)
+    with stage("chart: Order Volume and AOV"):
+        st.altair_chart(alt.layer(orders_line, aov_line).resolve_scale(y="independent"), use_container_width=True)
 else:
     st.line_chart(daily.set_index("date_day")[["orders_7d", "aov"]])
 
-cat = df.groupby("category", as_index=False)[["orders", "revenue"]].sum().sort_values("revenue", ascending=False)
-cat["aov"] = cat["revenue"] / cat["orders"].replace(0, np.nan)
+cat = query_cube(df, ["category"], columns=["orders", "revenue"], metrics=["aov"]).sort_values(
+    "revenue", ascending=False
+)
 cat = cat.fillna(0)
 
 left, right = st.columns(2)
@@ -102,7 +108,8 @@ with left:
                 tooltip=["category", "revenue", "orders", "aov"],
             )
         )
-        st.altair_chart(chart, use_container_width=True)
+        with stage("chart: Revenue Mix by Category"):
+            st.altair_chart(chart, use_container_width=True)
     else:
         st.bar_chart(cat.set_index("category")["revenue"])
 
@@ -123,12 +130,14 @@ with right:
                 tooltip=["category", "aov", "orders", "revenue"],
             )
         )
-        st.altair_chart(chart, use_container_width=True)
+        with stage("chart: AOV by Category"):
+            st.altair_chart(chart, use_container_width=True)
     else:
         st.bar_chart(cat.set_index("category")["aov"])
 
-pareto = prod[["product", "revenue"]].copy().sort_values("revenue", ascending=False)
-pareto["cum_rev_share"] = pareto["revenue"].cumsum() / pareto["revenue"].sum()
+# Large catalogues keep their top products and one "Other" bar; the cumulative share is
+# computed before collapsing, so the line still ends at the exact total.
+pareto = collapse_categories(prod[["product", "revenue"]], "product", "revenue", cum_share_column="cum_rev_share")
 pareto["rank"] = np.arange(1, len(pareto) + 1)
 
 st.subheader("Product Concentration (Pareto)")
@@ -160,12 +169,16 @@ if alt:
             ),
         )
     )
-    st.altair_chart(alt.layer(bars, line).resolve_scale(y="independent"), use_container_width=True)
+    with stage("chart: Product Concentration (Pareto)"):
+        st.altair_chart(alt.layer(bars, line).resolve_scale(y="independent"), use_container_width=True)
 else:
     st.bar_chart(pareto.set_index("product")["revenue"])
 
-table = prod[["product", "category", "orders", "revenue", "rev_share"]].copy()
-table["orders"] = table["orders"].apply(format_k)
-table["revenue"] = table["revenue"].apply(lambda v: format_k(v, currency=True))
-table["rev_share"] = table["rev_share"].apply(lambda v: format_pct(v, 1))
-st.dataframe(table, use_container_width=True)
+table, column_config = format_table(
+    prod[["product", "category", "orders", "revenue", "rev_share"]],
+    {"orders": "count", "revenue": "currency", "rev_share": ("pct", 1)},
+)
+with stage("table: Product Concentration (Pareto)"):
+    st.dataframe(table, use_container_width=True, column_config=column_config)
+
+show_profile()
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from logic.charts import count_rows, fold_series
+
+alt = pytest.importorskip("altair")
+
+
+@pytest.fixture
+def trend():
+    rng = np.random.default_rng(5)
+    days = pd.date_range("2024-01-01", periods=40, freq="D")
+    cost = rng.gamma(2.0, 50.0, len(days))
+    revenue = cost * rng.uniform(0.5, 4.0, len(days))
+    cost[[3, 17]] = np.nan
+    revenue[[17, 30]] = [np.nan, 0.0]
+    return pd.DataFrame(
+        {
+            "date_day": days,
+            "cost": cost,
+            "revenue": revenue,
+            "roas_7d": revenue / cost,
+            "orders": rng.integers(0, 20, len(days)),
+        }
+    )
+
+
+@pytest.fixture
+def campaign():
+    segments = ["Scale", "Optimize", "Test", "Pause", "Test", None, "Scale", "Test", None, "Pause"]
+    return pd.DataFrame(
+        {
+            "campaign_name": [f"c{i}" for i in range(len(segments))],
+            "segment": pd.Series(segments, dtype="str"),
+            "cost": np.arange(len(segments), dtype=float),
+        }
+    )
+
+
+def _records(chart):
+    (values,) = chart.to_dict()["datasets"].values()
+    return values
+
+
+# Vega's fold: for each input row, in order, one row per field with the key and value added.
+def _vega_fold(records, fields, as_):
+    return [{**row, as_[0]: field, as_[1]: row[field]} for row in records for field in fields]
+
+
+# Vega's count(): one row per distinct value of the grouping field, missing values included.
+def _vega_count(records, field, as_):
+    counts = {}
+    for row in records:
+        counts[row[field]] = counts.get(row[field], 0) + 1
+    return [{field: value, as_: n} for value, n in counts.items()]
+
+
+def _project(records, columns):
+    return sorted(
+        (tuple(row[c] for c in columns) for row in records),
+        key=lambda row: tuple((v is None, "" if v is None else v) for v in row),
+    )
+
+
+def test_fold_series_matches_transform_fold(trend):
+    columns = ["cost", "revenue"]
+    folded = fold_series(trend, "date_day", columns, key="metric", value="value")
+
+    assert list(folded.columns) == ["date_day", "metric", "value"]
+    assert folded["date_day"].dtype == trend["date_day"].dtype
+    assert isinstance(folded["metric"].dtype, pd.CategoricalDtype)
+    assert list(folded["metric"].cat.categories) == columns
+    assert folded["value"].dtype == np.float64
+    assert len(folded) == len(trend) * len(columns)
+
+    # The data the old chart folded in the browser, against the data the new one ships.
+    old = alt.Chart(trend).transform_fold(columns, as_=["metric", "value"]).mark_line()
+    new = alt.Chart(folded).mark_line()
+    expected = _vega_fold(_records(old), columns, ["metric", "value"])
+    shipped = _records(new)
+    assert list(shipped[0]) == ["date_day", "metric", "value"]
+    assert _project(shipped, ["date_day", "metric", "value"]) == _project(
+        expected, ["date_day", "metric", "value"]
+    )
+
+
+def test_fold_series_keeps_series_order(trend):
+    folded = fold_series(trend, "date_day", ["revenue", "cost"])
+    assert list(folded["metric"].cat.categories) == ["revenue", "cost"]
+    assert folded["metric"].iloc[0] == "revenue"
+    assert folded.loc[folded["metric"] == "cost", "value"].tolist() == pytest.approx(
+        trend["cost"].tolist(), nan_ok=True
+    )
+
+
+@pytest.mark.parametrize("categorical", [False, True])
+def test_count_rows_matches_count_encoding(campaign, categorical):
+    if categorical:
+        campaign = campaign.assign(
+            segment=pd.Categorical(campaign["segment"], categories=["Scale", "Optimize", "Test", "Pause", "Unused"])
+        )
+    counted = count_rows(campaign, "segment", as_="campaigns")
+
+    assert list(counted.columns) == ["segment", "campaigns"]
+    assert counted["campaigns"].dtype == np.int64
+    assert counted["segment"].dtype == campaign["segment"].dtype
+    assert counted["campaigns"].sum() == len(campaign)
+
+    old = alt.Chart(campaign).mark_bar().encode(x="segment:N", y="count():Q")
+    new = alt.Chart(counted).mark_bar().encode(x="segment:N", y="campaigns:Q")
+    expected = _vega_count(_records(old), "segment", "campaigns")
+    shipped = _records(new)
+    assert list(shipped[0]) == ["segment", "campaigns"]
+    assert _project(shipped, ["segment", "campaigns"]) == _project(expected, ["segment", "campaigns"])
+
+
+def test_count_rows_on_empty_frame(campaign):
+    counted = count_rows(campaign.iloc[:0], "segment", as_="campaigns")
+    assert list(counted.columns) == ["segment", "campaigns"]
+    assert counted.empty
+    assert counted["campaigns"].dtype == np.int64
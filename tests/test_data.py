@@ -0,0 +1,39 @@
+import os
+
+import pandas as pd
+import pytest
+import streamlit as st
+
+from logic import data
+from logic.data import DATA_PATH, load_data
+from logic.synthetic import generate_data
+
+
+@pytest.fixture
+def csv_only(tmp_path, monkeypatch):
+    # No snapshot and no result cache, so load_data parses the CSV itself.
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("logic.disk_cache.DISK_CACHE_BYTES", 0)
+    monkeypatch.setattr(data, "sync_snapshot", lambda path=DATA_PATH: None)
+    os.makedirs("data")
+    generate_data(3000, days=30, n_campaigns=12, n_keywords=40, seed=2).to_csv(DATA_PATH, index=False)
+    st.cache_resource.clear()
+
+
+def test_csv_fallback_parses_only_requested_columns(csv_only, monkeypatch):
+    parsed = []
+    read_csv = pd.read_csv
+
+    def recording(*args, **kwargs):
+        frame = read_csv(*args, **kwargs)
+        parsed.append(list(frame.columns))
+        return frame
+
+    monkeypatch.setattr(data.pd, "read_csv", recording)
+    columns = ["date", "date_day", "campaign", "cost"]
+    pruned = load_data(columns=columns)
+
+    assert parsed == [["date", "channel", "campaign", "cost"]]
+    assert list(pruned.columns) == columns
+    full = load_data()
+    pd.testing.assert_frame_equal(pruned, full[columns])
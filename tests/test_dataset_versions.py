@@ -0,0 +1,98 @@
+import gc
+import glob
+import json
+import os
+import shutil
+import weakref
+
+import pandas as pd
+import pytest
+import streamlit as st
+
+from logic.cube import _CUBE_STATE, FILTER_DIMENSIONS, load_cube, load_filter_index
+from logic.data import DATA_PATH, load_data
+from logic.filter_index import date_bounds
+from logic.metrics import ADDITIVE_COLUMNS
+from logic.synthetic import generate_data
+from logic.ui import FILTER_CACHE, _cached_filter_rows
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("logic.disk_cache.DISK_CACHE_BYTES", 0)
+    os.makedirs("data")
+    rows = generate_data(4000, days=40, n_campaigns=20, n_keywords=50, seed=1)
+    st.cache_resource.clear()
+    FILTER_CACHE.clear()
+    _CUBE_STATE.clear()
+    return rows
+
+
+def _export(rows, stop, mtime):
+    rows.iloc[:stop].to_csv(DATA_PATH, index=False)
+    os.utime(DATA_PATH, (mtime, mtime))
+
+
+def _load_all():
+    index = load_filter_index(dims=("campaign",))
+    filtered = _cached_filter_rows(index, date_bounds(index), {}, copy=False)
+    return load_data(), load_cube(dims=("campaign",)), index["frame"], filtered
+
+
+def test_new_export_releases_previous_version(dataset):
+    refs = []
+    for i, stop in enumerate((2000, 3000, 4000)):
+        _export(dataset, stop, 1_700_000_000 + i)
+        refs.append([weakref.ref(frame) for frame in _load_all()])
+        gc.collect()
+
+    alive = [[ref() is not None for ref in frames] for frames in refs]
+    assert alive == [[False] * 4, [False] * 4, [True] * 4]
+    assert FILTER_CACHE.stats()["entries"] == 1
+
+
+def test_cube_state_is_the_cached_cube(dataset):
+    _export(dataset, 4000, 1_700_000_000)
+    cube = load_cube(dims=("campaign",), compact=False)
+    assert _CUBE_STATE[FILTER_DIMENSIONS + ("campaign",)]["cube"] is cube
+
+
+def _cold_totals():
+    st.cache_resource.clear()
+    _CUBE_STATE.clear()
+    shutil.rmtree(os.path.join("data", ".cache"))
+    return load_data()[list(ADDITIVE_COLUMNS)].sum(), load_cube(dims=("campaign",))[list(ADDITIVE_COLUMNS)].sum()
+
+
+def _snapshot_parts():
+    (manifest,) = glob.glob(os.path.join("data", ".cache", "*", "manifest.json"))
+    with open(manifest) as fh:
+        return json.load(fh)["parts"]
+
+
+def test_appended_rows_are_ingested_incrementally(dataset):
+    _export(dataset, 3000, 1_700_000_000)
+    load_data(), load_cube(dims=("campaign",))
+    _export(dataset, 4000, 1_700_000_001)
+    totals = load_data()[list(ADDITIVE_COLUMNS)].sum(), load_cube(dims=("campaign",))[list(ADDITIVE_COLUMNS)].sum()
+
+    assert len(_snapshot_parts()) == 2
+    for incremental, cold in zip(totals, _cold_totals()):
+        pd.testing.assert_series_equal(incremental, cold)
+
+
+def test_edited_row_before_an_append_is_picked_up(dataset):
+    _export(dataset, 3000, 1_700_000_000)
+    load_data(), load_cube(dims=("campaign",))
+
+    # Same byte length, so only the content of an already ingested row changes.
+    edited = dataset.copy()
+    value = str(edited.at[1, "impressions"])
+    edited.at[1, "impressions"] = int(("8" if value[0] == "9" else "9") + value[1:])
+    _export(edited, 4000, 1_700_000_001)
+    totals = load_data()[list(ADDITIVE_COLUMNS)].sum(), load_cube(dims=("campaign",))[list(ADDITIVE_COLUMNS)].sum()
+
+    assert len(_snapshot_parts()) == 1
+    for restated, cold in zip(totals, _cold_totals()):
+        pd.testing.assert_series_equal(restated, cold)
@@ -0,0 +1,80 @@
+import glob
+import os
+import pickle
+
+import pytest
+import streamlit as st
+
+from logic import disk_cache
+from logic.cube import _CUBE_STATE, load_cube
+from logic.data import DATA_PATH, load_data
+from logic.disk_cache import persistent
+from logic.synthetic import generate_data
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(disk_cache, "DISK_CACHE_DIR", str(tmp_path / "results"))
+    monkeypatch.setattr(disk_cache, "DISK_CACHE_BYTES", 1 << 20)
+    return tmp_path / "results"
+
+
+def _counting(namespace, value):
+    calls = []
+
+    @persistent(namespace)
+    def compute(key):
+        calls.append(key)
+        return value
+
+    return compute, calls
+
+
+class _Moved:
+    pass
+
+
+def test_unreadable_entries_are_misses(cache_dir):
+    compute, calls = _counting("test", {"a": 1})
+    compute(1)
+    (path,) = glob.glob(str(cache_dir / "*.pkl"))
+
+    # An entry pickled before a class moved, as after a library upgrade, and a truncated one.
+    for payload in (pickle.dumps(_Moved()).replace(b"_Moved", b"_Gone_"), b"\x80\x05garbage"):
+        with open(path, "wb") as fh:
+            fh.write(payload)
+        assert compute(1) == {"a": 1}
+    assert calls == [1, 1, 1]
+    assert compute(1) == {"a": 1} and calls == [1, 1, 1]
+
+
+def test_entries_larger_than_the_cache_are_not_written(cache_dir):
+    compute, calls = _counting("big", b"x" * (2 << 20))
+    before = disk_cache.disk_cache_stats()["skipped"]
+    compute(1)
+    compute(1)
+    assert calls == [1, 1]
+    assert not os.listdir(cache_dir)
+    assert disk_cache.disk_cache_stats()["skipped"] == before + 2
+
+
+def test_library_versions_are_part_of_the_key(monkeypatch):
+    current = disk_cache._code_version()
+    monkeypatch.setattr(disk_cache, "_library_version", lambda name: "0.0" if name == "pandas" else None)
+    assert disk_cache._code_version() != current
+
+
+def test_snapshot_backed_data_is_not_pickled(cache_dir, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    generate_data(2000, days=20, n_campaigns=10, n_keywords=20, seed=5).to_csv(DATA_PATH, index=False)
+    monkeypatch.setattr(disk_cache, "DISK_CACHE_BYTES", 64 << 20)
+    st.cache_resource.clear()
+    _CUBE_STATE.clear()
+
+    load_data()
+    load_cube(dims=("campaign",))
+    names = [os.path.basename(p) for p in glob.glob(str(cache_dir / "*.pkl"))]
+    assert glob.glob(os.path.join("data", ".cache", "*", "manifest.json"))
+    assert not [n for n in names if n.startswith("load_data-")]
+    assert [n for n in names if n.startswith("cube-")]
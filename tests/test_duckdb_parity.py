@@ -0,0 +1,148 @@
+import datetime
+import os
+
+import pandas as pd
+import pytest
+import streamlit as st
+
+from logic import duckdb_backend
+from logic.cube import _CUBE_STATE, CUBE_DIMENSIONS, query_cube, query_cube_sets
+from logic.data import DATA_PATH
+from logic.metrics import ADDITIVE_COLUMNS
+from logic.shared import share_frame
+from logic.synthetic import generate_data
+from logic.ui import FILTER_CACHE, _cached_filter_rows, load_filter_index
+
+pytest.importorskip("duckdb")
+
+RATIOS = ["ctr", "atc_rate", "cvr", "roas", "cpc", "cpa", "aov"]
+
+# Every page's cube queries, by the dimensions its filtered cube is loaded with.
+PAGE_QUERIES = {
+    "overview": (("channel",), [(["channel"], {"columns": ["cost", "revenue"]})]),
+    "executive": (
+        ("channel",),
+        [
+            (["date_day"], {"columns": ["cost", "revenue", "impressions", "clicks", "orders"], "metrics": ["roas"]}),
+            (["channel"], {"metrics": ["ctr", "cvr", "atc_rate", "roas", "cpc", "cpa"]}),
+        ],
+    ),
+    "optimization": (
+        ("campaign",),
+        [(["campaign", "channel", "campaign_type"], {"metrics": ["ctr", "cvr", "roas", "cpc", "cpa"]})],
+    ),
+    "sales": (
+        ("product", "category"),
+        [
+            (["date_day"], {"columns": ["orders", "revenue"], "metrics": ["aov"]}),
+            (["product", "category"], {"columns": ["orders", "revenue"]}),
+            (["category"], {"columns": ["orders", "revenue"], "metrics": ["aov"]}),
+        ],
+    ),
+}
+
+KEYWORD_SETS = {
+    "keyword": (["keyword"], None),
+    "channel_keyword": (["channel", "keyword"], None),
+    "auto_terms": (["campaign", "keyword"], {"campaign_types": ["Auto"]}),
+}
+
+SIDEBARS = {
+    "defaults": lambda index: (None, {}),
+    "filtered": lambda index: (
+        (datetime.date(2025, 1, 10), datetime.date(2025, 2, 20)),
+        {
+            "channel": index["dimensions"]["channel"]["values"][:3],
+            "campaign_type": ["Auto", "Manual"],
+            "product": index["dimensions"]["product"]["values"][::2],
+        },
+    ),
+    "empty": lambda index: ((datetime.date(2025, 1, 10), datetime.date(2025, 1, 20)), {"channel": []}),
+}
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(tmp_path_factory.mktemp("parity"))
+        mp.setattr("logic.disk_cache.DISK_CACHE_BYTES", 0)
+        os.makedirs("data")
+        generate_data(20_000, days=60, n_campaigns=40, n_keywords=300, n_products=30, seed=7).to_csv(
+            DATA_PATH, index=False
+        )
+        st.cache_resource.clear()
+        FILTER_CACHE.clear()
+        _CUBE_STATE.clear()
+        yield
+
+
+def _filtered(dims, compact, sidebar):
+    index = load_filter_index(dims=CUBE_DIMENSIONS, compact=compact)
+    date_range, selections = SIDEBARS[sidebar](index)
+    dimensions = index["dimensions"]
+    selections = {col: selections.get(col, dimensions[col]["values"]) for col in dimensions}
+    frame = index["frame"]
+    date_range = date_range or (frame["date_day"].min().date(), frame["date_day"].max().date())
+    return _cached_filter_rows(index, date_range, selections, copy=False, dims=dims)
+
+
+def _both(monkeypatch, query):
+    monkeypatch.setattr(duckdb_backend, "QUERY_BACKEND", "pandas")
+    expected = query()
+    monkeypatch.setattr(duckdb_backend, "QUERY_BACKEND", "duckdb")
+    return expected, query()
+
+
+def _assert_same(result, expected):
+    # DuckDB sums integers as BIGINT, so only the integer width may differ, and float
+    # sums may differ in the last bits from the summation order.
+    assert list(result.columns) == list(expected.columns)
+    for col in expected.columns:
+        if pd.api.types.is_integer_dtype(expected[col]):
+            assert result[col].dtype == "int64"
+        else:
+            assert result[col].dtype == expected[col].dtype, col
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False, rtol=1e-9)
+
+
+@pytest.mark.parametrize("sidebar", sorted(SIDEBARS))
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize("page", sorted(PAGE_QUERIES))
+def test_page_queries(dataset, monkeypatch, page, compact, sidebar):
+    dims, queries = PAGE_QUERIES[page]
+    df = _filtered(dims, compact, sidebar)
+    assert duckdb_backend.supports(df)
+    for group, options in queries:
+        expected, result = _both(monkeypatch, lambda: query_cube(df, group, **options))
+        _assert_same(result, expected)
+
+
+@pytest.mark.parametrize("sidebar", sorted(SIDEBARS))
+@pytest.mark.parametrize("compact", [False, True])
+def test_keyword_sets(dataset, monkeypatch, compact, sidebar):
+    df = _filtered(("campaign", "keyword"), compact, sidebar)
+    expected, result = _both(monkeypatch, lambda: query_cube_sets(df, KEYWORD_SETS, metrics=RATIOS[:6]))
+    for name in KEYWORD_SETS:
+        _assert_same(result[name], expected[name])
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_partition_cube_with_query_filters(dataset, monkeypatch, compact):
+    # Partition cubes are their own source: selections were pushed into the reader.
+    cube = load_filter_index(dims=("product", "category"), compact=compact)["frame"]
+    cube = share_frame(cube.copy(), source=(("test", compact), None, None))
+    filters = {
+        "date_range": (datetime.date(2025, 1, 5), datetime.date(2025, 1, 25)),
+        "products": list(cube["product"].astype(str).unique()[:5]),
+    }
+    expected, result = _both(
+        monkeypatch, lambda: query_cube(cube, ["product"], filters=filters, metrics=["roas", "aov"])
+    )
+    _assert_same(result, expected)
+
+
+def test_frames_without_source_stay_in_pandas(dataset, monkeypatch):
+    df = _filtered(("channel",), False, "filtered").copy()
+    assert not duckdb_backend.supports(df)
+    expected, result = _both(monkeypatch, lambda: query_cube(df, ["channel"], columns=ADDITIVE_COLUMNS))
+    pd.testing.assert_frame_equal(result, expected)
@@ -0,0 +1,70 @@
+import datetime
+import os
+
+import pandas as pd
+import pytest
+import streamlit as st
+
+from logic import ui
+from logic.cube import _CUBE_STATE, CUBE_DIMENSIONS, FILTER_DIMENSIONS, load_filter_index
+from logic.data import DATA_PATH
+from logic.filter_index import filter_rows
+from logic.metrics import rollup
+from logic.startup import PAGE_DIMENSIONS
+from logic.synthetic import generate_data
+from logic.ui import FILTER_CACHE, _cached_filter_rows
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("logic.disk_cache.DISK_CACHE_BYTES", 0)
+    os.makedirs("data")
+    generate_data(6000, days=45, n_campaigns=20, n_keywords=60, seed=4).to_csv(DATA_PATH, index=False)
+    st.cache_resource.clear()
+    FILTER_CACHE.clear()
+    _CUBE_STATE.clear()
+
+
+def _sidebar(index):
+    dimensions = index["dimensions"]
+    return (datetime.date(2025, 1, 5), datetime.date(2025, 2, 1)), {
+        "channel": dimensions["channel"]["values"][:2],
+        "campaign_type": dimensions["campaign_type"]["values"],
+        "product": dimensions["product"]["values"][1::2],
+    }
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_pages_reuse_one_filtered_result(dataset, monkeypatch, compact):
+    calls = []
+
+    def counting(*args, **kwargs):
+        calls.append(args[1:])
+        return filter_rows(*args, **kwargs)
+
+    monkeypatch.setattr(ui, "filter_rows", counting)
+    index = load_filter_index(dims=CUBE_DIMENSIONS, compact=compact)
+    date_range, selections = _sidebar(index)
+
+    # Executive -> Keywords -> Sales -> Executive with the same sidebar.
+    pages = [("channel",), ("campaign", "keyword"), ("product", "category"), ("channel",)]
+    frames = [_cached_filter_rows(index, date_range, selections, copy=False, dims=dims) for dims in pages]
+    assert len(calls) == 1
+    assert frames[3] is frames[0]
+    assert FILTER_CACHE.stats()["entries"] == 1 + 3
+
+
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize("dims", PAGE_DIMENSIONS)
+def test_page_cube_matches_filtering_the_page_cube(dataset, dims, compact):
+    # What each page got before: its own cube, filtered.
+    index = load_filter_index(dims=CUBE_DIMENSIONS, compact=compact)
+    date_range, selections = _sidebar(index)
+    page = _cached_filter_rows(index, date_range, selections, copy=False, dims=dims)
+    own = filter_rows(load_filter_index(dims=dims, compact=compact), date_range, selections)
+
+    group = list(dict.fromkeys(FILTER_DIMENSIONS + dims))
+    assert list(page.columns) == list(own.columns)
+    assert len(page) == len(own)
+    pd.testing.assert_frame_equal(rollup(page, group), rollup(own, group), check_dtype=False)
@@ -0,0 +1,117 @@
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import streamlit as st
+
+from logic import duckdb_backend
+from logic.cube import _CUBE_STATE, CUBE_DIMENSIONS, query_cube, query_cube_sets
+from logic.data import DATA_PATH
+from logic.synthetic import generate_data
+from logic.ui import FILTER_CACHE, _cached_filter_rows, load_filter_index
+
+RATIOS = ["ctr", "atc_rate", "cvr", "roas", "cpc", "cpa"]
+
+# The grouping sets pages/3_Keywords.py computes in one query_cube_sets call.
+KEYWORD_SETS = {
+    "keyword": (["keyword"], None),
+    "channel_keyword": (["channel", "keyword"], None),
+    "auto_terms": (["campaign", "keyword"], {"campaign_types": ["Auto"]}),
+}
+
+SIDEBARS = {
+    "defaults": lambda index: (None, {}),
+    "filtered": lambda index: (
+        (datetime.date(2025, 1, 10), datetime.date(2025, 2, 20)),
+        {
+            "channel": index["dimensions"]["channel"]["values"][:3],
+            "product": index["dimensions"]["product"]["values"][::2],
+        },
+    ),
+    "manual only": lambda index: (None, {"campaign_type": ["Manual"]}),
+    "empty": lambda index: ((datetime.date(2025, 1, 10), datetime.date(2025, 1, 20)), {"channel": []}),
+}
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(tmp_path_factory.mktemp("grouping_sets"))
+        mp.setattr("logic.disk_cache.DISK_CACHE_BYTES", 0)
+        mp.setattr(duckdb_backend, "QUERY_BACKEND", "pandas")
+        os.makedirs("data")
+        generate_data(20_000, days=60, n_campaigns=40, n_keywords=300, n_products=30, seed=11).to_csv(
+            DATA_PATH, index=False
+        )
+        st.cache_resource.clear()
+        FILTER_CACHE.clear()
+        _CUBE_STATE.clear()
+        yield
+
+
+def _keyword_frame(compact, sidebar):
+    # The frame the Keywords page passes to query_cube_sets.
+    index = load_filter_index(dims=CUBE_DIMENSIONS, compact=compact)
+    date_range, selections = SIDEBARS[sidebar](index)
+    dimensions = index["dimensions"]
+    selections = {col: selections.get(col, dimensions[col]["values"]) for col in dimensions}
+    frame = index["frame"]
+    date_range = date_range or (frame["date_day"].min().date(), frame["date_day"].max().date())
+    return _cached_filter_rows(index, date_range, selections, copy=False, dims=("campaign", "keyword"))
+
+
+def _assert_same(result, expected):
+    # groupby picks the integer width from the values (compact int32 sums stay int32
+    # unless they overflow); the kernel always sums integers as int64. Float sums may
+    # differ in the last bits from the summation order.
+    assert list(result.columns) == list(expected.columns)
+    for col in expected.columns:
+        if pd.api.types.is_integer_dtype(expected[col]):
+            assert result[col].dtype == "int64", col
+        else:
+            assert result[col].dtype == expected[col].dtype, col
+    if expected.empty:
+        # An empty groupby result stores categorical codes as int8 whatever the categories.
+        assert result.empty
+        return
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False, rtol=1e-9)
+
+
+@pytest.mark.parametrize("sidebar", sorted(SIDEBARS))
+@pytest.mark.parametrize("compact", [False, True])
+def test_keyword_sets_match_query_cube(dataset, compact, sidebar):
+    df = _keyword_frame(compact, sidebar)
+    result = query_cube_sets(df, KEYWORD_SETS, metrics=RATIOS)
+    assert list(result) == list(KEYWORD_SETS)
+    for name, (dims, filters) in KEYWORD_SETS.items():
+        _assert_same(result[name], query_cube(df, dims, filters=filters, metrics=RATIOS))
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_each_set_alone_matches_query_cube(dataset, compact):
+    # One set at a time uses a smaller base grouping than the three together.
+    df = _keyword_frame(compact, "filtered")
+    for name, (dims, filters) in KEYWORD_SETS.items():
+        (result,) = query_cube_sets(df, {name: (dims, filters)}, metrics=RATIOS).values()
+        _assert_same(result, query_cube(df, dims, filters=filters, metrics=RATIOS))
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_missing_values_and_query_filters(dataset, compact):
+    # groupby drops missing keys per set; filters on other columns are applied per set.
+    df = pd.DataFrame(_keyword_frame(compact, "defaults")).copy()
+    rng = np.random.default_rng(3)
+    for col in ("keyword", "channel", "campaign"):
+        df.loc[rng.random(len(df)) < 0.05, col] = None
+    sets = dict(
+        KEYWORD_SETS,
+        late_products=(
+            ["product", "keyword"],
+            {"date_range": (datetime.date(2025, 2, 1), datetime.date(2025, 3, 1)), "channels": ["Google"]},
+        ),
+    )
+    result = query_cube_sets(df, sets, metrics=RATIOS)
+    for name, (dims, filters) in sets.items():
+        _assert_same(result[name], query_cube(df, dims, filters=filters, metrics=RATIOS))
@@ -0,0 +1,105 @@
+import datetime
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from logic import prefix_index
+from logic.cube import build_cube
+from logic.data import prepare_rows
+from logic.filter_index import INDEX_DIMENSIONS
+from logic.metrics import ADDITIVE_COLUMNS
+from logic.prefix_index import build_prefix_index, previous_range, range_totals
+from logic.synthetic import generate_data
+
+
+@pytest.fixture(scope="module")
+def cube():
+    rows = generate_data(5000, days=90, n_campaigns=30, n_products=25, seed=3)
+    return build_cube(prepare_rows(rows), ("date_day",) + INDEX_DIMENSIONS)
+
+
+def _scan(cube, date_range, selections):
+    # The full-scan totals the index replaces.
+    days = cube["date_day"].dt.date
+    mask = (days >= date_range[0]) & (days <= date_range[1])
+    for col, selected in selections.items():
+        if selected is not None:
+            mask &= cube[col].isin(selected)
+    return cube.loc[mask, [c for c in ADDITIVE_COLUMNS if c in cube.columns]].sum()
+
+
+@pytest.mark.parametrize(
+    "date_range",
+    [
+        (datetime.date(2025, 1, 1), datetime.date(2025, 3, 31)),
+        (datetime.date(2025, 2, 3), datetime.date(2025, 2, 3)),
+        (datetime.date(2025, 2, 10), datetime.date(2025, 3, 5)),
+        (datetime.date(2024, 10, 1), datetime.date(2024, 12, 31)),
+        (datetime.date(2025, 3, 20), datetime.date(2025, 6, 1)),
+    ],
+)
+def test_range_totals_match_a_scan(cube, date_range):
+    prefix = build_prefix_index(cube)
+    products = sorted(cube["product"].unique())
+    for selections in (
+        {},
+        {"channel": ["Amazon", "TikTok"], "campaign_type": None},
+        {"product": products[::3], "campaign_type": ["Auto"]},
+        {"channel": []},
+    ):
+        for period in (date_range, previous_range(date_range)):
+            totals = range_totals(prefix, period, selections)
+            expected = _scan(cube, period, selections)
+            assert list(totals) == list(ADDITIVE_COLUMNS)
+            for col in ADDITIVE_COLUMNS:
+                assert totals[col] == pytest.approx(expected[col], rel=1e-9, abs=1e-6)
+            assert all(isinstance(totals[col], int) for col in ("impressions", "clicks", "orders"))
+
+
+def test_storage_is_ragged(cube):
+    # Only combination-days that have rows are stored, plus the zero row.
+    prefix = build_prefix_index(cube)
+    stored = len(cube.groupby(["date_day"] + list(INDEX_DIMENSIONS), observed=True))
+    assert prefix["cumulative"].shape == (stored + 1, len(ADDITIVE_COLUMNS))
+
+
+def test_cap_boundary(cube, monkeypatch, caplog):
+    cells = (len(build_prefix_index(cube)["keys"]) + 1) * len(ADDITIVE_COLUMNS)
+
+    monkeypatch.setattr(prefix_index, "PREFIX_MAX_CELLS", cells)
+    with caplog.at_level(logging.WARNING, logger="logic.prefix_index"):
+        assert build_prefix_index(cube) is not None
+    assert not caplog.records
+
+    monkeypatch.setattr(prefix_index, "PREFIX_MAX_CELLS", cells - 1)
+    with caplog.at_level(logging.WARNING, logger="logic.prefix_index"):
+        assert build_prefix_index(cube) is None
+    assert "PREFIX_MAX_CELLS" in caplog.text
+
+
+def test_wide_catalog_fits_under_the_cap(monkeypatch):
+    # 40k products over two years: a dense combinations x days layout would need about
+    # 58M cells, the ragged one stores one entry per row here.
+    n = 40_000
+    rng = np.random.default_rng(0)
+    cube = pd.DataFrame(
+        {
+            "date_day": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 730, n), unit="D"),
+            "channel": rng.choice(["Amazon", "Google"], n),
+            "campaign_type": rng.choice(["Auto", "Manual"], n),
+            "product": [f"SKU_{i}" for i in range(n)],
+            "cost": rng.exponential(5.0, n),
+            "revenue": rng.exponential(20.0, n),
+        }
+    )
+    assert len(cube) * 730 * 2 > prefix_index.PREFIX_MAX_CELLS
+    prefix = build_prefix_index(cube)
+    assert prefix is not None
+    date_range = (datetime.date(2024, 3, 1), datetime.date(2025, 2, 28))
+    for selections in ({}, {"product": ["SKU_1", "SKU_2", "SKU_3"]}):
+        totals = range_totals(prefix, date_range, selections)
+        expected = _scan(cube, date_range, selections)
+        assert totals["cost"] == pytest.approx(expected["cost"])
+        assert totals["revenue"] == pytest.approx(expected["revenue"])
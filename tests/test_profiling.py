@@ -0,0 +1,68 @@
+import pytest
+
+from logic import profiling
+from logic.profiling import profiled_fragment, stage, start_profiling
+
+
+@pytest.fixture
+def shown(monkeypatch):
+    # The records each show_profile() call would render, instead of rendering them.
+    monkeypatch.setattr(profiling, "PROFILE_DEFAULT", True)
+    calls = []
+
+    def show():
+        calls.append([r["stage"] for r in profiling._RUN.records])
+        profiling._RUN.records = None
+
+    monkeypatch.setattr(profiling, "show_profile", show)
+    yield calls
+    profiling._RUN.records = None
+
+
+def _stopped_run():
+    # A page run that ends in st.stop() never reaches show_profile().
+    start_profiling("Executive")
+    with stage("load_filtered_cube"):
+        pass
+
+
+@profiled_fragment("Keywords")
+def keyword_actions():
+    with stage("negate"):
+        pass
+
+
+def test_each_run_starts_with_no_records(shown):
+    _stopped_run()
+    start_profiling("Sales")
+    with stage("query_cube[date_day]"):
+        pass
+    profiling.show_profile()
+    assert shown == [["query_cube[date_day]"]]
+
+
+def test_fragment_rerun_profiles_and_shows_itself(shown, monkeypatch):
+    _stopped_run()
+    monkeypatch.setattr(profiling, "_fragment_rerun", lambda: True)
+    keyword_actions()
+    assert shown == [["negate"]]
+    assert profiling._RUN.page == "Keywords (keyword_actions)"
+
+
+def test_fragment_in_full_run_records_into_the_page(shown, monkeypatch):
+    monkeypatch.setattr(profiling, "_fragment_rerun", lambda: False)
+    start_profiling("Keywords")
+    with stage("rollups"):
+        pass
+    keyword_actions()
+    profiling.show_profile()
+    assert shown == [["rollups", "negate"]]
+
+
+def test_disabled_fragment_rerun_drops_stale_records(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DEFAULT", True)
+    _stopped_run()
+    monkeypatch.setattr(profiling, "PROFILE_DEFAULT", False)
+    monkeypatch.setattr(profiling, "_fragment_rerun", lambda: True)
+    keyword_actions()
+    assert profiling._RUN.records is None
@@ -0,0 +1,204 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from logic.optimization import optimization_flags
+from logic.rules import (
+    AUTO_TERM_RULES,
+    CAMPAIGN_ACTION_RULES,
+    CAMPAIGN_SEGMENT_RULES,
+    CHANNEL_EFFICIENCY_RULES,
+    CHANNEL_QUALITY_RULES,
+    classify,
+)
+
+# The row-wise classifiers the rule sets replaced, as they were written on the pages.
+
+
+def _flag(r, min_spend):
+    if r.cost > min_spend and r.orders == 0:
+        return "NEGATIVE"
+    elif r.roas > 3 and r.campaign_type == "Auto":
+        return "PROMOTE"
+    return "OK"
+
+
+def _segment(row, volume_cut, eff_cut):
+    high_volume = row["cost"] >= volume_cut
+    high_eff = row["eff_score"] >= eff_cut
+    if high_volume and high_eff:
+        return "Scale"
+    if high_volume and not high_eff:
+        return "Optimize"
+    if not high_volume and high_eff:
+        return "Test"
+    return "Pause"
+
+
+def _action(row):
+    if row["segment"] == "Scale":
+        return "Increase budget 10-20%"
+    if row["segment"] == "Optimize":
+        return "Reduce bids and tighten targeting"
+    if row["segment"] == "Test":
+        return "Try new creatives and audience expansion"
+    return "Pause or keep minimal learning budget"
+
+
+def _channel_quality(row, ctr_median, cvr_median):
+    if row["ctr"] >= ctr_median and row["cvr"] >= cvr_median:
+        return "Scale budget"
+    if row["ctr"] >= ctr_median and row["cvr"] < cvr_median:
+        return "Fix landing page / offer"
+    if row["ctr"] < ctr_median and row["cvr"] >= cvr_median:
+        return "Improve creatives"
+    return "Refine targeting"
+
+
+def _channel_efficiency(row, target_roas, avg_cpc):
+    if row["roas"] >= target_roas * 1.1 and row["cpc"] <= avg_cpc * 1.05:
+        return "Scale"
+    if row["roas"] < target_roas * 0.9 and row["cpc"] > avg_cpc * 1.1:
+        return "Fix cost + quality"
+    if row["roas"] < target_roas * 0.9:
+        return "Fix conversion"
+    if row["cpc"] > avg_cpc * 1.1:
+        return "Tighten bids"
+    return "Maintain/Test"
+
+
+def _suggest(row, min_spend, min_orders, target_roas, ctr_median, cvr_median):
+    if row["cost"] >= min_spend and row["orders"] >= min_orders and row["roas"] >= target_roas:
+        return "PROMOTE_TO_MANUAL"
+    if row["cost"] >= min_spend and row["orders"] == 0:
+        return "NEGATE"
+    if row["ctr"] >= ctr_median and row["cvr"] < cvr_median:
+        return "FIX_LANDING"
+    return "KEEP_RUNNING"
+
+
+PARAMS = {
+    "min_spend": 25.0,
+    "min_orders": 2,
+    "target_roas": 3.0,
+    "avg_cpc": 1.2,
+    "ctr_median": 0.02,
+    "cvr_median": 0.1,
+    "volume_cut": 100.0,
+    "eff_cut": 2.5,
+}
+
+
+def _with_ratios(df):
+    # Ratios computed from raw counts, so zero denominators yield NaN and inf as on the pages.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        df["ctr"] = df["clicks"] / df["impressions"]
+        df["cvr"] = df["orders"] / df["clicks"]
+        df["roas"] = df["revenue"] / df["cost"]
+        df["cpc"] = df["cost"] / df["clicks"]
+    return df
+
+
+def _frame(n=4000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            "campaign_type": rng.choice(["Auto", "Manual"], n),
+            "impressions": rng.choice([0, 10, 1000], n) * rng.integers(0, 5, n),
+            "clicks": rng.integers(0, 50, n),
+            "orders": rng.integers(0, 5, n),
+            "cost": np.round(rng.choice([0.0, 1.0, 25.0, 100.0], n) * rng.integers(0, 4, n), 2),
+            "revenue": np.round(rng.exponential(150, n) * rng.integers(0, 2, n), 2),
+            "eff_score": rng.normal(2.5, 1.0, n),
+        }
+    )
+    df = _with_ratios(df)
+
+    # Rows sitting exactly on every cut, scaled cuts included, plus NaN and inf values.
+    p = PARAMS
+    edges = pd.DataFrame(
+        {
+            "campaign_type": ["Auto"] * 6 + ["Manual"] * 6,
+            "impressions": [100] * 12,
+            "clicks": [10] * 12,
+            "orders": [0, p["min_orders"], 0, p["min_orders"], 1, 0] * 2,
+            "cost": [p["min_spend"], p["min_spend"], p["volume_cut"], p["volume_cut"], 0.0, np.nan] * 2,
+            "revenue": [0.0] * 12,
+            "eff_score": [p["eff_cut"], np.nan, np.inf, -np.inf, p["eff_cut"], 0.0] * 2,
+            "ctr": [p["ctr_median"], np.nan, np.inf, 0.0, p["ctr_median"], p["ctr_median"]] * 2,
+            "cvr": [p["cvr_median"], p["cvr_median"], np.nan, np.inf, 0.0, p["cvr_median"]] * 2,
+            "roas": [
+                3.0,
+                p["target_roas"],
+                p["target_roas"] * 1.1,
+                p["target_roas"] * 0.9,
+                np.inf,
+                np.nan,
+            ]
+            * 2,
+            "cpc": [
+                p["avg_cpc"] * 1.05,
+                p["avg_cpc"] * 1.1,
+                p["avg_cpc"],
+                np.nan,
+                np.inf,
+                0.0,
+            ]
+            * 2,
+        }
+    )
+    return pd.concat([df, edges], ignore_index=True)
+
+
+def _expected(df, func, **params):
+    return np.array([func(row, **params) for _, row in df.iterrows()], dtype=object)
+
+
+@pytest.fixture(params=["object", "category"])
+def frame(request):
+    df = _frame()
+    if request.param == "category":
+        # Compact mode loads dimensions as categoricals.
+        df["campaign_type"] = df["campaign_type"].astype("category")
+    return df
+
+
+def test_optimization_flags(frame):
+    expected = np.array([_flag(r, PARAMS["min_spend"]) for _, r in frame.iterrows()], dtype=object)
+    flags = optimization_flags(frame.copy(), min_spend=PARAMS["min_spend"])["flag"]
+    assert list(flags) == list(expected)
+
+
+def test_campaign_segments_and_actions(frame):
+    cuts = {"volume_cut": PARAMS["volume_cut"], "eff_cut": PARAMS["eff_cut"]}
+    segment = classify(frame, CAMPAIGN_SEGMENT_RULES, **cuts)
+    assert list(segment) == list(_expected(frame, _segment, **cuts))
+
+    frame = frame.assign(segment=segment)
+    assert list(classify(frame, CAMPAIGN_ACTION_RULES)) == list(_expected(frame, _action))
+
+
+def test_channel_quality(frame):
+    params = {"ctr_median": PARAMS["ctr_median"], "cvr_median": PARAMS["cvr_median"]}
+    actions = classify(frame, CHANNEL_QUALITY_RULES, **params)
+    assert list(actions) == list(_expected(frame, _channel_quality, **params))
+
+
+def test_channel_efficiency(frame):
+    params = {"target_roas": PARAMS["target_roas"], "avg_cpc": PARAMS["avg_cpc"]}
+    actions = classify(frame, CHANNEL_EFFICIENCY_RULES, **params)
+    assert list(actions) == list(_expected(frame, _channel_efficiency, **params))
+
+
+def test_auto_term_suggestions(frame):
+    params = {
+        key: PARAMS[key] for key in ("min_spend", "min_orders", "target_roas", "ctr_median", "cvr_median")
+    }
+    suggestions = classify(frame, AUTO_TERM_RULES, **params)
+    assert list(suggestions) == list(_expected(frame, _suggest, **params))
+
+
+def test_first_matching_rule_wins():
+    df = pd.DataFrame({"x": [1, 5, 10]})
+    rules = [([("x", ">=", 5)], "high"), ([("x", ">=", 1)], "low"), ([], "none")]
+    assert list(classify(df, rules)) == ["low", "high", "high"]
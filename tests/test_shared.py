@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from logic.shared import INPLACE_METHODS, SharedFrame, SharedFrameError, share_frame
+
+
+@pytest.fixture
+def source():
+    return pd.DataFrame(
+        {
+            "date_day": pd.date_range("2025-01-01", periods=4, freq="D"),
+            "channel": pd.Series(["Google", "Amazon", None, "Google"], dtype="str"),
+            "product": pd.Categorical(["a", "b", "a", "c"]),
+            "clicks": np.array([3, 1, 4, 1], dtype=np.int64),
+            "cost": [2.5, np.nan, 1.0, 4.0],
+        }
+    )
+
+
+@pytest.fixture
+def shared(source):
+    return share_frame(source)
+
+
+MUTATIONS = {
+    "setitem": lambda df: df.__setitem__("cost", 0.0),
+    "setitem new column": lambda df: df.__setitem__("roas", 1.0),
+    "delitem": lambda df: df.__delitem__("cost"),
+    "insert": lambda df: df.insert(0, "roas", 1.0),
+    "pop": lambda df: df.pop("cost"),
+    "update": lambda df: df.update(pd.DataFrame({"cost": [9.0]})),
+    "loc": lambda df: df.loc.__setitem__((0, "cost"), 9.0),
+    "loc mask": lambda df: df.loc.__setitem__(df["clicks"] > 1, 0),
+    "iloc": lambda df: df.iloc.__setitem__((0, 4), 9.0),
+    "iloc column": lambda df: df.iloc.__setitem__((slice(None), 3), 0),
+    "at": lambda df: df.at.__setitem__((0, "cost"), 9.0),
+    "iat": lambda df: df.iat.__setitem__((0, 4), 9.0),
+    "columns": lambda df: setattr(df, "columns", list("abcde")),
+    "index": lambda df: setattr(df, "index", [4, 5, 6, 7]),
+    "fillna": lambda df: df.fillna(0.0, inplace=True),
+    "fillna dict": lambda df: df.fillna({"cost": 0.0}, inplace=True),
+    "sort_values": lambda df: df.sort_values("clicks", inplace=True),
+    "drop": lambda df: df.drop(columns=["cost"], inplace=True),
+    "drop rows": lambda df: df.drop(index=[0], inplace=True),
+    "rename": lambda df: df.rename(columns={"cost": "spend"}, inplace=True),
+    "replace": lambda df: df.replace(2.5, 9.0, inplace=True),
+    "replace str": lambda df: df.replace("Google", "Bing", inplace=True),
+    "where": lambda df: df.where(df["clicks"] > 1, inplace=True),
+    "mask": lambda df: df.mask(df["clicks"] > 1, inplace=True),
+    "clip": lambda df: df[["clicks", "cost"]].pipe(share_frame).clip(0, 2, inplace=True),
+    "dropna": lambda df: df.dropna(inplace=True),
+    "reset_index": lambda df: df.reset_index(drop=True, inplace=True),
+    "set_index": lambda df: df.set_index("channel", inplace=True),
+    "eval": lambda df: df.eval("cpc = cost / clicks", inplace=True),
+    "query": lambda df: df.query("clicks > 1", inplace=True),
+}
+
+
+@pytest.mark.parametrize("name", sorted(MUTATIONS))
+def test_mutations_raise_shared_frame_error(source, shared, name):
+    before = source.copy()
+    with pytest.raises(SharedFrameError):
+        MUTATIONS[name](shared)
+    pd.testing.assert_frame_equal(pd.DataFrame(shared), before)
+
+
+@pytest.mark.parametrize("name", INPLACE_METHODS)
+def test_every_inplace_method_is_guarded(name):
+    frame = share_frame(pd.DataFrame({"a": [1.0, 2.0]}))
+    method = getattr(frame, name)
+    with pytest.raises(SharedFrameError):
+        method(inplace=True)
+
+
+@pytest.mark.parametrize("column", ["date_day", "product", "clicks", "cost"])
+def test_column_buffers_are_read_only(source, shared, column):
+    before = source.copy()
+    with pytest.raises(ValueError, match="read-only"):
+        shared[column].array[0] = shared[column].iloc[1]
+    # Categorical to_numpy() materializes a new array; the others are views.
+    if column != "product":
+        with pytest.raises(ValueError, match="read-only"):
+            shared[column].to_numpy()[0] = shared[column].to_numpy()[1]
+    pd.testing.assert_frame_equal(pd.DataFrame(shared), before)
+
+
+def test_reads_and_derived_frames_are_unrestricted(shared):
+    assert shared.loc[0, "cost"] == 2.5
+    assert shared.iloc[1, 3] == 1
+    derived = shared[shared["clicks"] > 1]
+    assert not isinstance(derived, SharedFrame)
+    derived["cost"] = 0.0
+    shared.sort_values("clicks").fillna({"cost": 0.0})
+    copy = shared.copy()
+    copy.fillna({"cost": 0.0}, inplace=True)
+    copy.loc[0, "clicks"] = 7
+    assert shared.loc[0, "clicks"] == 3
+
+
+def test_sharing_does_not_copy(source, shared):
+    assert np.shares_memory(shared["cost"].to_numpy(), source["cost"].to_numpy())
+    assert share_frame(shared) is shared
@@ -0,0 +1,7 @@
+from logic.startup import IMPORT_BUDGET_SECONDS, measure_import_time
+
+
+def test_import_time_budget():
+    seconds, eager = measure_import_time(repeat=3)
+    assert seconds <= IMPORT_BUDGET_SECONDS, f"logic imports took {seconds:.2f}s, budget {IMPORT_BUDGET_SECONDS:.2f}s"
+    assert not [name for name, loaded in eager.items() if loaded], f"imported eagerly: {eager}"